@@ -1,6 +1,24 @@
 import pygame
+import argparse
 import math
+import os
 import random
+import sys
+
+from audio import EFFECTS, VOICES, Audio, pre_init
+from autopilot import Autopilot, ShipModel
+from capture import FORMATS, FrameRecorder
+from display import ScaledDisplay
+from idle import FramePacer
+from latency import LatencyProbe
+from leaderboard import Leaderboard
+from saucer_ai import SaucerAI, steer
+from soak import AllocationProbe, SoakMonitor
+from spawn import SpawnPlanner
+from assetcache import AssetCache
+from sprites import COLORKEY, COS, SIN, GlyphAtlas, RotationAtlas, cell_size, rotated, strip
+from tail_lod import TailLOD
+from waves import WaveScheduler, load_waves
 
 # Game constants
 WIDTH, HEIGHT = 800, 600
@@ -11,19 +29,82 @@ ASTEROID_SIZES = {'large': 60, 'medium': 40, 'small': 20}
 ASTEROID_SPEEDS = {'large': 1.5, 'medium': 1.7, 'small': 2}
 ORB_RADIUS = 10
 SAUCER_SIZE = 40
+SAUCER_SHOT_SPEED = 6
 TAIL_SEGMENT_LENGTH = 12
 TAIL_MAX_POINTS = 500
+ASTEROID_SHAPES = 8
 
+# Headless runs (soak tests) must not open a window
+if '--headless' in sys.argv:
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+# The mixer is set up for low latency before pygame.init opens it
+pre_init()
 pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Astersnake')
+display = ScaledDisplay((WIDTH, HEIGHT), 'Astersnake')
 clock = pygame.time.Clock()
 font = pygame.font.SysFont('Arial', 24)
+small_font = pygame.font.SysFont('Arial', 18)
+leaderboard = Leaderboard('as-gpt41')
+
+# Headless and muted runs do not even open the mixer
+audio = Audio(EFFECTS, VOICES, enabled='--headless' not in sys.argv and '--mute' not in sys.argv)
+
+# Ship triangle as (angle offset in radians, distance) around its center,
+# pre-rendered at every angle the 4 degree turns can reach
+SHIP_POINTS = [(0, SHIP_SIZE),
+               (math.atan2(-0.5, -0.6), math.hypot(0.6, 0.5) * SHIP_SIZE),
+               (math.atan2(0.5, -0.6), math.hypot(0.6, 0.5) * SHIP_SIZE)]
+
+def draw_ship(surface, center, angle):
+    pygame.draw.polygon(surface, (255, 255, 255), [(center[0] + x, center[1] + y)
+                                                   for x, y in rotated(SHIP_POINTS, angle)])
+
+def render_asteroids(size):
+    # A pool of random octagon outlines per size, the same ones on every start
+    radius = ASTEROID_SIZES[size] // 2
+    rng = random.Random(size)
+    cell = cell_size(radius * 1.2 + 1)
+    sheet = pygame.Surface((cell * ASTEROID_SHAPES, cell))
+    sheet.fill(COLORKEY)
+    for shape in range(ASTEROID_SHAPES):
+        cx, cy = shape * cell + cell // 2, cell // 2
+        points = []
+        for i in range(8):
+            ang = math.radians(i * 45)
+            r = radius * rng.uniform(0.8, 1.2)
+            points.append((cx + math.cos(ang) * r, cy + math.sin(ang) * r))
+        pygame.draw.polygon(sheet, (150, 150, 150), points, 2)
+    return sheet
+
+# Pre-rendered sheets are loaded from the on-disk cache, which is rebuilt
+# whenever this script or the shared drawing code changes
+HUD_COLORS = [(255, 255, 255), (255, 255, 0)]
+sprite_cache = AssetCache('as-gpt41', [__file__], extra=(pygame.font.match_font('arial'),))
+sheets = sprite_cache.load({
+    'ship': lambda: RotationAtlas.render([draw_ship], SHIP_SIZE, 4),
+    **{f'asteroid {size}': (lambda size=size: render_asteroids(size)) for size in ASTEROID_SIZES},
+    **{f'glyphs {i}': (lambda color=color: GlyphAtlas.render(font, color))
+       for i, color in enumerate(HUD_COLORS)},
+})
+ship_atlas = RotationAtlas([draw_ship], SHIP_SIZE, 4, sheets['ship'])
+asteroid_sprites = {size: strip(sheets[f'asteroid {size}'], ASTEROID_SHAPES) for size in ASTEROID_SIZES}
+hud_text, hud_lives = (GlyphAtlas(font, color, sheets[f'glyphs {i}']) for i, color in enumerate(HUD_COLORS))
 
 # Helper functions
-def wrap_position(pos):
-    x, y = pos
-    return x % WIDTH, y % HEIGHT
+def move_wrapped(pos, vel):
+    # Moves pos by vel in place, pos and vel are [x, y] lists
+    pos[0] = (pos[0] + vel[0]) % WIDTH
+    pos[1] = (pos[1] + vel[1]) % HEIGHT
+
+def remove_dead(items):
+    # Drops dead bullets or shots in place, keeping their order
+    alive = 0
+    for item in items:
+        if item.alive():
+            items[alive] = item
+            alive += 1
+    del items[alive:]
 
 def angle_to_vector(angle):
     rad = math.radians(angle)
@@ -34,11 +115,13 @@ def distance(a, b):
 
 # Classes
 class Ship:
+    __slots__ = ('pos', 'angle', 'vel', 'tail', 'tail_length', 'alive', 'cooldown', 'invincibility_timer')
+
     def __init__(self):
-        self.pos = (WIDTH // 2, HEIGHT // 2)
+        self.pos = [WIDTH // 2, HEIGHT // 2]
         self.angle = 0
         self.vel = [0, 0]
-        self.tail = []
+        self.tail = TailLOD(WIDTH, HEIGHT)  # Oldest first, older parts simplified
         self.tail_length = 0
         self.alive = True
         self.cooldown = 0
@@ -50,18 +133,14 @@ class Ship:
         if keys[pygame.K_RIGHT]:
             self.angle = (self.angle - 4) % 360
         if keys[pygame.K_UP]:
-            dx, dy = angle_to_vector(self.angle)
-            self.vel[0] += dx * 0.2
-            self.vel[1] += dy * 0.2
+            self.vel[0] += COS[self.angle] * 0.2
+            self.vel[1] -= SIN[self.angle] * 0.2
         self.vel[0] *= 0.99
         self.vel[1] *= 0.99
-        self.pos = wrap_position((self.pos[0] + self.vel[0], self.pos[1] + self.vel[1]))
-        # Tail follows ship
-        self.tail.insert(0, self.pos)
-        if len(self.tail) > self.tail_length:
-            self.tail.pop()
-        if len(self.tail) > TAIL_MAX_POINTS:
-            self.tail = self.tail[:TAIL_MAX_POINTS]
+        move_wrapped(self.pos, self.vel)
+        # Tail follows ship, it keeps its own copy of each position
+        self.tail.append((self.pos[0], self.pos[1]))
+        self.tail.trim(min(self.tail_length, TAIL_MAX_POINTS))
         if self.cooldown > 0:
             self.cooldown -= 1
         if self.invincibility_timer > 0:
@@ -70,26 +149,19 @@ class Ship:
     def grow_tail(self):
         self.tail_length += TAIL_SEGMENT_LENGTH
 
-    def draw(self, surf):
+    def draw(self, canvas):
         # Draw tail
-        if len(self.tail) > 1:
-            pygame.draw.lines(surf, (0, 255, 0), False, self.tail, 4)
+        for run in self.tail.polylines():
+            canvas.lines((0, 255, 0), False, run, 4)
         # Draw ship (blink if invincible)
         if self.invincibility_timer == 0 or (self.invincibility_timer // 5) % 2 == 0:
-            dx, dy = angle_to_vector(self.angle)
-            perp = (-dy, dx)
-            points = [
-                (self.pos[0] + dx * SHIP_SIZE, self.pos[1] + dy * SHIP_SIZE),
-                (self.pos[0] - dx * SHIP_SIZE * 0.6 + perp[0] * SHIP_SIZE * 0.5, self.pos[1] - dy * SHIP_SIZE * 0.6 + perp[1] * SHIP_SIZE * 0.5),
-                (self.pos[0] - dx * SHIP_SIZE * 0.6 - perp[0] * SHIP_SIZE * 0.5, self.pos[1] - dy * SHIP_SIZE * 0.6 - perp[1] * SHIP_SIZE * 0.5)
-            ]
-            pygame.draw.polygon(surf, (255, 255, 255), points)
+            ship_atlas.blit(canvas, self.pos, self.angle)
 
     def shoot(self):
         if self.cooldown == 0:
-            dx, dy = angle_to_vector(self.angle)
-            bullet_pos = (self.pos[0] + dx * SHIP_SIZE, self.pos[1] + dy * SHIP_SIZE)
-            bullet_vel = (self.vel[0] + dx * BULLET_SPEED, self.vel[1] + dy * BULLET_SPEED)
+            dx, dy = COS[self.angle], -SIN[self.angle]
+            bullet_pos = [self.pos[0] + dx * SHIP_SIZE, self.pos[1] + dy * SHIP_SIZE]
+            bullet_vel = [self.vel[0] + dx * BULLET_SPEED, self.vel[1] + dy * BULLET_SPEED]
             self.cooldown = 10
             return Bullet(bullet_pos, bullet_vel)
         return None
@@ -99,52 +171,47 @@ class Ship:
         if self.tail_length < SHIP_SIZE * 2:
             return False
         # Ignore first few tail points (ship body)
-        for pt in self.tail[SHIP_SIZE*2//TAIL_SEGMENT_LENGTH:]:
-            if distance(self.pos, pt) < TAIL_SEGMENT_LENGTH:
-                return True
-        return False
+        return self.tail.hits(self.pos[0], self.pos[1], TAIL_SEGMENT_LENGTH,
+                              skip_recent=SHIP_SIZE*2//TAIL_SEGMENT_LENGTH)
 
 class Bullet:
+    __slots__ = ('pos', 'vel', 'lifetime')
+
     def __init__(self, pos, vel):
         self.pos = pos
         self.vel = vel
         self.lifetime = 60
 
     def update(self):
-        self.pos = wrap_position((self.pos[0] + self.vel[0], self.pos[1] + self.vel[1]))
+        move_wrapped(self.pos, self.vel)
         self.lifetime -= 1
 
-    def draw(self, surf):
-        pygame.draw.circle(surf, (255, 255, 0), (int(self.pos[0]), int(self.pos[1])), 3)
+    def draw(self, canvas):
+        canvas.circle((255, 255, 0), (int(self.pos[0]), int(self.pos[1])), 3)
 
     def alive(self):
         return self.lifetime > 0
 
 class Asteroid:
+    __slots__ = ('pos', 'size', 'radius', 'vel', 'shape')
+
     def __init__(self, pos, size):
-        self.pos = pos
+        self.pos = [pos[0], pos[1]]
         self.size = size
         self.radius = ASTEROID_SIZES[size] // 2
         angle = random.uniform(0, 360)
         speed = ASTEROID_SPEEDS[size]
         dx, dy = angle_to_vector(angle)
-        self.vel = (dx * speed, dy * speed)
-        self.points = self.generate_shape()
-
-    def generate_shape(self):
-        points = []
-        for i in range(8):
-            ang = math.radians(i * 45)
-            r = self.radius * random.uniform(0.8, 1.2)
-            points.append((math.cos(ang) * r, math.sin(ang) * r))
-        return points
+        self.vel = [dx * speed, dy * speed]
+        self.shape = random.randrange(ASTEROID_SHAPES)
 
     def update(self):
-        self.pos = wrap_position((self.pos[0] + self.vel[0], self.pos[1] + self.vel[1]))
+        move_wrapped(self.pos, self.vel)
 
-    def draw(self, surf):
-        pts = [(self.pos[0] + x, self.pos[1] + y) for (x, y) in self.points]
-        pygame.draw.polygon(surf, (150, 150, 150), pts, 2)
+    def draw(self, canvas):
+        image = asteroid_sprites[self.size][self.shape]
+        half = image.get_width() // 2
+        canvas.blit(image, (int(self.pos[0]) - half, int(self.pos[1]) - half))
 
     def split(self):
         if self.size == 'large':
@@ -155,113 +222,282 @@ class Asteroid:
             return []
 
 class EnergyOrb:
-    def __init__(self):
-        self.pos = (random.randint(ORB_RADIUS, WIDTH-ORB_RADIUS), random.randint(ORB_RADIUS, HEIGHT-ORB_RADIUS))
+    __slots__ = ('pos',)
+
+    def __init__(self, pos=None):
+        if pos is None:
+            pos = (random.randint(ORB_RADIUS, WIDTH-ORB_RADIUS), random.randint(ORB_RADIUS, HEIGHT-ORB_RADIUS))
+        self.pos = tuple(pos)
 
-    def draw(self, surf):
-        pygame.draw.circle(surf, (0, 200, 255), (int(self.pos[0]), int(self.pos[1])), ORB_RADIUS)
+    def draw(self, canvas):
+        canvas.circle((0, 200, 255), (int(self.pos[0]), int(self.pos[1])), ORB_RADIUS)
 
 class Saucershot:
+    __slots__ = ('pos', 'vel', 'lifetime')
+
     def __init__(self, pos, vel):
         self.pos = pos
         self.vel = vel
         self.lifetime = 90
 
     def update(self):
-        self.pos = wrap_position((self.pos[0] + self.vel[0], self.pos[1] + self.vel[1]))
+        move_wrapped(self.pos, self.vel)
         self.lifetime -= 1
 
-    def draw(self, surf):
-        pygame.draw.circle(surf, (255, 0, 0), (int(self.pos[0]), int(self.pos[1])), 3)
+    def draw(self, canvas):
+        canvas.circle((255, 0, 0), (int(self.pos[0]), int(self.pos[1])), 3)
 
     def alive(self):
         return self.lifetime > 0
 
 class Saucer:
-    def __init__(self):
-        self.pos = (random.choice([0, WIDTH]), random.randint(0, HEIGHT))
-        self.vel = (random.choice([-3, 3]), random.uniform(-1, 1))
-        self.cooldown = 0
+    __slots__ = ('pos', 'vel', 'speed', 'wander', 'wander_timer', 'cooldown', 'radius')
+
+    def __init__(self, pos=None):
+        if pos is None:
+            pos = (random.choice([0, WIDTH]), random.randint(0, HEIGHT))
+        self.pos = [pos[0], pos[1]]
+        self.vel = [random.choice([-3, 3]), random.uniform(-1, 1)]
+        self.speed = math.hypot(*self.vel)
+        self.wander = math.atan2(self.vel[1], self.vel[0])
+        self.wander_timer = random.randint(60, 180)
+        self.cooldown = random.randint(30, 90)
         self.radius = SAUCER_SIZE // 2
 
-    def update(self):
-        self.pos = wrap_position((self.pos[0] + self.vel[0], self.pos[1] + self.vel[1]))
+    def steering_input(self):
+        return (self.pos[0], self.pos[1], self.vel[0], self.vel[1],
+                self.speed, math.cos(self.wander), math.sin(self.wander))
+
+    def update(self, plan):
+        # plan comes from SaucerAI: desired velocity and aim direction
+        self.vel[0], self.vel[1] = steer(self.vel[0], self.vel[1], plan[0], plan[1], 0.15)
+        move_wrapped(self.pos, self.vel)
+        self.wander_timer -= 1
+        if self.wander_timer <= 0:
+            self.wander = random.uniform(0, 2 * math.pi)
+            self.wander_timer = random.randint(60, 180)
         if self.cooldown > 0:
             self.cooldown -= 1
 
-    def draw(self, surf):
-        pygame.draw.rect(surf, (255, 0, 255), (self.pos[0] - self.radius, self.pos[1] - self.radius//2, SAUCER_SIZE, SAUCER_SIZE//2))
-        pygame.draw.circle(surf, (255, 0, 255), (int(self.pos[0]), int(self.pos[1])), self.radius//2)
+    def draw(self, canvas):
+        canvas.rect((255, 0, 255), (self.pos[0] - self.radius, self.pos[1] - self.radius//2, SAUCER_SIZE, SAUCER_SIZE//2))
+        canvas.circle((255, 0, 255), (int(self.pos[0]), int(self.pos[1])), self.radius//2)
 
-    def shoot(self, target):
+    def shoot(self, plan):
+        # Fires along the intercept direction from the plan
         if self.cooldown == 0:
-            dx = target[0] - self.pos[0]
-            dy = target[1] - self.pos[1]
-            dist = math.hypot(dx, dy)
-            if dist == 0:
-                dist = 1
-            vel = (dx/dist*6, dy/dist*6)
-            self.cooldown = 40
-            return Saucershot(self.pos, vel)
+            vel = [plan[2] * SAUCER_SHOT_SPEED, plan[3] * SAUCER_SHOT_SPEED]
+            self.cooldown = 90
+            return Saucershot([self.pos[0], self.pos[1]], vel)
         return None
 
+def autopilot_keys(action):
+    # Ship.update only looks at these keys
+    return {pygame.K_LEFT: action.turn > 0, pygame.K_RIGHT: action.turn < 0, pygame.K_UP: action.thrust}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Astersnake')
+    parser.add_argument('--autopilot', action='store_true',
+                        help='let the bot play (restarts automatically, for soak tests)')
+    parser.add_argument('--bot-budget-us', type=int,
+                        help='autopilot planning budget per frame in microseconds '
+                             '(default 2000; --soak and --alloc-stats measure it, tracemalloc slows planning down)')
+    parser.add_argument('--window-scale', type=float, default=1.0,
+                        help='window size relative to the %dx%d playfield (F9/F10 at runtime)' % (WIDTH, HEIGHT))
+    parser.add_argument('--render-scale', type=float, default=1.0,
+                        help='draw at this fraction of the %dx%d resolution and scale up, '
+                             'for slow machines (F6/F7 at runtime)' % (WIDTH, HEIGHT))
+    parser.add_argument('--smooth', action='store_true',
+                        help='use smoothscale when the window is scaled (F8 at runtime)')
+    parser.add_argument('--fullscreen', action='store_true',
+                        help='start fullscreen (F11 at runtime)')
+    parser.add_argument('--mute', action='store_true',
+                        help='start without sound')
+    parser.add_argument('--headless', action='store_true',
+                        help='run the simulation without drawing or frame rate cap')
+    parser.add_argument('--soak', type=float, metavar='SECONDS',
+                        help='soak test: let the bot play for SECONDS while tracking memory')
+    parser.add_argument('--soak-interval', type=float, default=60, metavar='SECONDS',
+                        help='time between soak memory samples')
+    parser.add_argument('--soak-max-growth-mb', type=float, default=32,
+                        help='fail the soak test if memory grows by more than this')
+    parser.add_argument('--busy-loop', action='store_true',
+                        help='pace frames with clock.tick_busy_loop (steadier, keeps a core busy)')
+    parser.add_argument('--latency', action='store_true',
+                        help='print key press to display flip latency on exit')
+    parser.add_argument('--alloc-stats', type=int, nargs='?', const=0, metavar='FRAMES',
+                        help='measure per-frame allocations of the entity updates and collisions '
+                             '(uses tracemalloc, slower), stopping after FRAMES measured frames if given')
+    parser.add_argument('--stress', action='store_true',
+                        help='play the stress waves (40 asteroids, 30 saucers) to benchmark crowded frames')
+    parser.add_argument('--record', metavar='DIR',
+                        help='save drawn frames to DIR as an image sequence, encoded in the background')
+    parser.add_argument('--record-format', choices=FORMATS, default='png',
+                        help='frame files: png, or raw RGB24 (larger, cheapest to write)')
+    parser.add_argument('--record-every', type=int, default=1, metavar='N',
+                        help='only record every Nth frame')
+    args = parser.parse_args()
+    if args.record and args.headless:
+        parser.error('--record saves drawn frames, headless runs draw nothing')
+    if args.record_every < 1:
+        parser.error('--record-every must be at least 1')
+    if not 0.25 <= args.render_scale <= 1:
+        parser.error('--render-scale must be between 0.25 and 1')
+    return args
+
 # Game loop and logic
-def main():
+def run_game(args, pacer, autopilot=None, soak=None, probe=None, latency=None, recorder=None):
+    # Returns True when the player asked for a new game
     ship = Ship()
     bullets = []
-    asteroids = [Asteroid((random.randint(0, WIDTH), random.randint(0, HEIGHT)), 'large') for _ in range(4)]
-    orbs = [EnergyOrb()]
+    asteroids = []
+    orbs = []
     saucers = []
     saucershots = []
+
+    def block_spawns(spawner):
+        # Everything the collision checks can kill the ship with, plus room around it
+        spawner.block(ship.pos[0], ship.pos[1], 150)
+        for asteroid in asteroids:
+            spawner.block(asteroid.pos[0], asteroid.pos[1], asteroid.radius + 20)
+        for saucer in saucers:
+            spawner.block(saucer.pos[0], saucer.pos[1], saucer.radius + 20)
+        for shot in saucershots:
+            spawner.block(shot.pos[0], shot.pos[1], 20)
+        for x, y in ship.tail.lethal_points(spacing=spawner.grid.cell_size):
+            spawner.block(x, y, 15)
+        for orb in orbs:
+            spawner.keep_apart(orb.pos[0], orb.pos[1])
+
+    spawner = SpawnPlanner(WIDTH, HEIGHT, block_spawns)
+    saucer_ai = SaucerAI(WIDTH, HEIGHT, SAUCER_SHOT_SPEED)
+
+    # Spawners for the wave scheduler, False when the grid has no safe spot
+    def spawn_asteroid(wave):
+        size = random.choice(wave.get('sizes', ['large']))
+        pos = spawner.find_position(spacing=100, clearance=ASTEROID_SIZES[size] // 2 + 20)
+        if pos:
+            asteroids.append(Asteroid(tuple(pos), size))
+        return bool(pos)
+
+    def spawn_orb(wave):
+        pos = spawner.find_position(margin=ORB_RADIUS, spacing=150)
+        if pos:
+            orbs.append(EnergyOrb(pos))
+        return bool(pos)
+
+    def spawn_saucer(wave):
+        pos = spawner.find_edge_position(edges=('left', 'right'), clearance=SAUCER_SIZE // 2 + 20)
+        if pos:
+            saucers.append(Saucer(pos))
+        return bool(pos)
+
+    # Initial field, saucer timing and refills all come from waves.json
+    waves = WaveScheduler(
+        load_waves('as-gpt41 stress' if args.stress else 'as-gpt41'),
+        {'asteroid': spawn_asteroid, 'orb': spawn_orb, 'saucer': spawn_saucer},
+        {'asteroid': lambda: len(asteroids), 'orb': lambda: len(orbs), 'saucer': lambda: len(saucers)})
+    tick = 0
     score = 0
-    saucer_timer = 0
+    high_score = leaderboard.high_score
+    run_start = pygame.time.get_ticks()
     running = True
     game_over = False
+    paused = False
+    paused_at = 0
     lives = 10  # Add lives
 
     def reset_ship():
-        ship.pos = (WIDTH // 2, HEIGHT // 2)
+        ship.pos = [WIDTH // 2, HEIGHT // 2]
         ship.angle = 0
         ship.vel = [0, 0]
-        ship.tail = []
+        ship.tail.clear()
         ship.tail_length = 0
         ship.cooldown = 0
         ship.invincibility_timer = FPS * 2  # 2 seconds of invincibility
 
     while running:
-        clock.tick(FPS)
-        keys = pygame.key.get_pressed()
-        for event in pygame.event.get():
+        if not args.headless:
+            # Capped while playing, lower in the background; idle frames wait for events below
+            pacer.tick()
+        if autopilot and game_over:
+            return True
+        # The game over and pause screens block here until something happens
+        events = pacer.events(paused or (game_over and not autopilot))
+        if latency:
+            latency.pumped(events, waited=pacer.idle)
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
-            if not game_over and event.type == pygame.KEYDOWN:
+            if display.handle_event(event):
+                continue
+            if not game_over and event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+                paused = not paused
+                if paused:
+                    paused_at = pygame.time.get_ticks()
+                    audio.pause()
+                else:
+                    audio.resume()
+                    # The recorded run duration leaves out the time spent paused
+                    run_start += pygame.time.get_ticks() - paused_at
+            if not game_over and not paused and event.type == pygame.WINDOWFOCUSLOST and not autopilot:
+                paused = True
+                paused_at = pygame.time.get_ticks()
+                audio.pause()
+            if not game_over and not paused and event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     bullet = ship.shoot()
                     if bullet:
                         bullets.append(bullet)
+                        audio.play('shot')
             if game_over and event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:
-                    main()
-                    return
-
-        if not game_over:
+                    return True
+        # One keyboard sample per frame, taken after the pump so it includes this frame's events
+        keys = pygame.key.get_pressed()
+        if autopilot and not game_over and not paused:
+            tail = []
+            if ship.tail_length >= SHIP_SIZE * 2:
+                tail = ship.tail.lethal_points(skip_recent=8, spacing=autopilot.grid.cell_size)
+            action = autopilot.plan(
+                ship.pos, ship.vel, ship.angle,
+                [orb.pos for orb in orbs],
+                [(a.pos[0], a.pos[1], a.vel[0], a.vel[1], a.radius) for a in asteroids]
+                + [(s.pos[0], s.pos[1], s.vel[0], s.vel[1], s.radius) for s in saucers],
+                [(s.pos[0], s.pos[1], s.vel[0], s.vel[1]) for s in saucershots],
+                tail)
+            keys = autopilot_keys(action)
+            if action.shoot:
+                bullet = ship.shoot()
+                if bullet:
+                    bullets.append(bullet)
+                    audio.play('shot')
+
+        if not game_over and not paused:
+            # Steering and aiming for every saucer in one batched pass
+            plans = saucer_ai.plan([saucer.steering_input() for saucer in saucers],
+                                   [(a.pos[0], a.pos[1], a.radius) for a in asteroids],
+                                   [(ship.pos[0], ship.pos[1], ship.vel[0], ship.vel[1])])
+
+            # Entities move in place and the collision passes below work on the lists
+            # directly, so a frame without hits or spawns allocates next to nothing
+            if probe:
+                probe.start()
             ship.update(keys)
             for bullet in bullets:
                 bullet.update()
-            bullets = [b for b in bullets if b.alive()]
+            remove_dead(bullets)
             for asteroid in asteroids:
                 asteroid.update()
-            for orb in orbs:
-                pass
-            for saucer in saucers:
-                saucer.update()
-                if random.random() < 0.02:
-                    shot = saucer.shoot(ship.pos)
-                    if shot:
-                        saucershots.append(shot)
+            for saucer, plan in zip(saucers, plans):
+                saucer.update(plan)
+                shot = saucer.shoot(plan)
+                if shot:
+                    saucershots.append(shot)
+                    audio.play('enemy shot')
             for shot in saucershots:
                 shot.update()
-            saucershots = [s for s in saucershots if s.alive()]
+            remove_dead(saucershots)
 
             # Collisions
             hit = False
@@ -288,56 +524,78 @@ def main():
                     hit = True
             if hit:
                 lives -= 1
+                audio.play('player hit')
                 if lives <= 0:
                     game_over = True
+                    # Written by the leaderboard thread, the loop keeps running. Bot
+                    # runs stay off the board, they would push human scores out of it.
+                    if not autopilot:
+                        leaderboard.submit(score, 1, ship.tail_length, (pygame.time.get_ticks() - run_start) / 1000)
                 else:
                     reset_ship()
-            # Ship with orbs
-            for orb in orbs[:]:
-                if distance(ship.pos, orb.pos) < SHIP_SIZE//2 + ORB_RADIUS:
-                    orbs.remove(orb)
+            # Spawn positions below come from the grid, rebuilt at most once per frame
+            spawner.invalidate()
+            # Ship with orbs (walking backwards so removals do not skip anything)
+            for i in range(len(orbs) - 1, -1, -1):
+                if distance(ship.pos, orbs[i].pos) < SHIP_SIZE//2 + ORB_RADIUS:
+                    del orbs[i]
                     ship.grow_tail()
                     score += 10
-                    orbs.append(EnergyOrb())
+                    audio.play('orb')
+                    pos = spawner.find_position(margin=ORB_RADIUS, spacing=150)
+                    if pos:
+                        orbs.append(EnergyOrb(pos))
             # Bullets with asteroids
-            for bullet in bullets[:]:
-                for asteroid in asteroids[:]:
+            for i in range(len(bullets) - 1, -1, -1):
+                bullet = bullets[i]
+                for j, asteroid in enumerate(asteroids):
                     if distance(bullet.pos, asteroid.pos) < asteroid.radius:
-                        bullets.remove(bullet)
-                        asteroids.remove(asteroid)
-                        new_asteroids = asteroid.split()
-                        asteroids.extend(new_asteroids)
+                        del bullets[i]
+                        del asteroids[j]
+                        asteroids.extend(asteroid.split())
                         score += 20 if asteroid.size == 'small' else 10
+                        audio.play(f'asteroid {asteroid.size}')
                         break
             # Bullets with saucers
-            for bullet in bullets[:]:
-                for saucer in saucers[:]:
+            for i in range(len(bullets) - 1, -1, -1):
+                bullet = bullets[i]
+                for j, saucer in enumerate(saucers):
                     if distance(bullet.pos, saucer.pos) < saucer.radius:
-                        bullets.remove(bullet)
-                        saucers.remove(saucer)
+                        del bullets[i]
+                        del saucers[j]
                         score += 50
+                        audio.play('saucer down')
                         break
             # Bullets with saucer shots (cancel out)
-            for bullet in bullets[:]:
-                for shot in saucershots[:]:
+            for i in range(len(bullets) - 1, -1, -1):
+                bullet = bullets[i]
+                for j, shot in enumerate(saucershots):
                     if distance(bullet.pos, shot.pos) < 6:
-                        bullets.remove(bullet)
-                        saucershots.remove(shot)
+                        del bullets[i]
+                        del saucershots[j]
                         break
-
-            # Spawn saucers
-            saucer_timer += 1
-            if saucer_timer > 600:
-                saucers.append(Saucer())
-                saucer_timer = 0
-            # Keep orbs on field
-            if len(orbs) < 1:
-                orbs.append(EnergyOrb())
-            # Keep asteroids on field
-            if len(asteroids) < 3:
-                asteroids.append(Asteroid((random.randint(0, WIDTH), random.randint(0, HEIGHT)), random.choice(['large', 'medium'])))
+            if probe:
+                probe.stop()
+                if args.alloc_stats and probe.frames >= args.alloc_stats:
+                    return False
+
+            # Spawn saucers and refill orbs and asteroids when a wave is due
+            tick += 1
+            waves.advance(tick)
+            high_score = max(high_score, score, leaderboard.high_score)
+
+        # Saucers hum while any are around, and the hum ends with the run
+        audio.loop('saucer hum', not game_over and bool(saucers))
+
+        if soak:
+            soak.tick()
+            if soak.done:
+                return False
+        if args.headless or not pacer.should_draw((game_over, paused, high_score, leaderboard.top)):
+            continue
 
         # Drawing
+        screen = display.canvas
         screen.fill((10, 10, 30))
         for orb in orbs:
             orb.draw(screen)
@@ -350,16 +608,75 @@ def main():
         for shot in saucershots:
             shot.draw(screen)
         ship.draw(screen)
-        score_text = font.render(f'Score: {score}', True, (255,255,255))
-        screen.blit(score_text, (10, 10))
-        lives_text = font.render(f'Lives: {lives}', True, (255,255,0))
-        screen.blit(lives_text, (10, 40))
+        hud_text.blit(screen, f'Score: {score}', (10, 10))
+        hud_lives.blit(screen, f'Lives: {lives}', (10, 40))
+        high_text = f'High Score: {high_score}'
+        hud_text.blit(screen, high_text, (WIDTH - hud_text.width(high_text) - 10, 10))
         if game_over:
             over_text = font.render('GAME OVER! Press R to restart.', True, (255, 0, 0))
-            screen.blit(over_text, (WIDTH//2 - over_text.get_width()//2, HEIGHT//2))
-        pygame.display.flip()
+            screen.blit(over_text, (WIDTH//2 - over_text.get_width()//2, HEIGHT//4))
+            # Top scores come from the leaderboard's in-memory cache
+            y = HEIGHT//4 + 50
+            for rank, entry in enumerate(leaderboard.top, 1):
+                line = f'{rank:2}.  {entry.score:6}   Tail {entry.tail_length:4}   {int(entry.duration) // 60}:{int(entry.duration) % 60:02}'
+                entry_text = small_font.render(line, True, (255,255,255))
+                screen.blit(entry_text, (WIDTH//2 - entry_text.get_width()//2, y))
+                y += 22
+        elif paused:
+            paused_text = font.render('PAUSED - press P to resume', True, (255, 255, 255))
+            screen.blit(paused_text, (WIDTH//2 - paused_text.get_width()//2, HEIGHT//3))
+        if recorder:
+            recorder.capture(display.surface)
+        display.present()
+        if latency:
+            latency.flipped()
+    return False
 
+def main():
+    args = parse_args()
+    display.smooth = args.smooth
+    if args.render_scale != 1.0:
+        display.set_render_scale(args.render_scale)
+    if args.window_scale != 1.0:
+        display.set_scale(args.window_scale)
+    if args.fullscreen:
+        display.toggle_fullscreen()
+    autopilot = None
+    if args.autopilot or args.soak:
+        autopilot = Autopilot(ShipModel(WIDTH, HEIGHT, SHIP_SIZE // 2, 4, 0.2, 0.99),
+                              budget_us=args.bot_budget_us or 2000)
+    soak = None
+    if args.soak:
+        soak = SoakMonitor(args.soak, args.soak_interval, args.soak_max_growth_mb)
+        soak.start()
+    probe = AllocationProbe('entities') if args.alloc_stats is not None else None
+    if autopilot and (soak or probe) and args.bot_budget_us is None:
+        # tracemalloc now runs and slows planning down, measure a full plan again
+        print(f'autopilot: budget calibrated to {autopilot.calibrate()} us under tracemalloc')
+    pacer = FramePacer(clock, FPS, busy_loop=args.busy_loop)
+    latency = LatencyProbe() if args.latency and not args.headless else None
+    recorder = None
+    if args.record:
+        recorder = FrameRecorder(args.record, (WIDTH, HEIGHT), args.record_format, args.record_every)
+    try:
+        while run_game(args, pacer, autopilot, soak, probe, latency, recorder):
+            pass
+    except KeyboardInterrupt:
+        pass  # Ctrl-C is how headless runs without a limit end, the reports still print
+    if autopilot:
+        print(autopilot.report())
+    if latency:
+        print(latency.report())
+    if probe:
+        print(probe.report())
+    if recorder:
+        recorder.close()  # Writes out the frames still queued
+        print(recorder.report())
+    passed = soak.finish() if soak else True
     pygame.quit()
+    return passed
 
 if __name__ == '__main__':
-    main()
+    passed = main()
+    leaderboard.close()
+    sys.exit(0 if passed else 1)
@@ -1,11 +1,40 @@
 #!/usr/bin/env python3
 import pygame
+import argparse
+import copy
+import os
 import sys
 import math
 import random
+import time
 from typing import List, Tuple, Optional
 
-# Initialize pygame
+from autopilot import Autopilot, ShipModel
+from capture import FORMATS, FrameRecorder
+from collisions import Collision, CollisionStage
+from display import ScaledDisplay
+from idle import FramePacer
+from latency import LatencyProbe
+from leaderboard import Leaderboard
+from simloop import SimulationThread, TimingStats
+from saucer_ai import SaucerAI, steer
+from soak import SoakMonitor
+from assetcache import AssetCache
+from audio import EFFECTS, VOICES, Audio, pre_init
+from sprites import (COLORKEY, COS, SIN, GlyphAtlas, RotationAtlas, TailLayer, cell_size, rotated,
+                     strip)
+from spawn import SpawnPlanner
+from splitscreen import SplitScreen
+from tail_index import TailIndex
+from tail_lod import TailLOD
+from waves import WaveScheduler, load_waves
+
+# Headless runs (soak tests) must not open a window
+if "--headless" in sys.argv:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+# Initialize pygame, with the mixer set up for low latency first
+pre_init()
 pygame.init()
 
 # Game constants
@@ -18,25 +47,163 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
+SAUCER_BULLET_SPEED = 5
+SAUCER_RADIUS = 15
 
 # Create the game window
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Astersnake")
+display = ScaledDisplay((WIDTH, HEIGHT), "Astersnake")
 clock = pygame.time.Clock()
 
+# Ship outline and thrust flame as (angle offset in radians, distance) around the center
+SHIP_SIZE = 15
+SHIP_POINTS = [(0, SHIP_SIZE), (2.5, SHIP_SIZE / 2), (-2.5, SHIP_SIZE / 2)]
+FLAME_POINTS = [(math.pi, SHIP_SIZE / 2), (3, SHIP_SIZE / 3), (-3, SHIP_SIZE / 3)]
+SHIP, SHIP_FLAME, FLAME = range(3)
+
+def draw_polygons(*layers):
+    # Atlas variant drawing the (color, points) layers in order
+    def draw(surface, center, angle):
+        for color, points in layers:
+            pygame.draw.polygon(surface, color, [(center[0] + x, center[1] + y)
+                                                 for x, y in rotated(points, angle)])
+    return draw
+
+def ship_variants(color):
+    # Ship, ship with flame and flame alone
+    return [draw_polygons((color, SHIP_POINTS)),
+            draw_polygons((color, SHIP_POINTS), (YELLOW, FLAME_POINTS)),
+            draw_polygons((YELLOW, FLAME_POINTS))]
+
+# Split-screen players: ship color, tail gradient (oldest, newest) and controls as
+# (rotate left, rotate right, thrust, shoot) key tuples with a description for the menu
+PLAYER_COLORS = [WHITE, (255, 170, 60), (140, 255, 140), (255, 130, 255)]
+TAIL_GRADIENTS = [((0, 0, 100), (0, 255, 255)), ((100, 30, 0), (255, 170, 0)),
+                  ((0, 90, 0), (90, 255, 90)), ((90, 0, 90), (255, 90, 255))]
+CONTROLS = [
+    ("W A D, SPACE to shoot", ((pygame.K_a,), (pygame.K_d,), (pygame.K_w,), (pygame.K_SPACE,))),
+    ("Arrow keys, RIGHT CTRL to shoot",
+     ((pygame.K_LEFT,), (pygame.K_RIGHT,), (pygame.K_UP,), (pygame.K_RCTRL,))),
+    ("I J L, K to shoot", ((pygame.K_j,), (pygame.K_l,), (pygame.K_i,), (pygame.K_k,))),
+    ("Keypad 8 4 6, keypad 0 to shoot",
+     ((pygame.K_KP4,), (pygame.K_KP6,), (pygame.K_KP8,), (pygame.K_KP0,))),
+]
+# A single player can use either the arrow keys or WASD
+SOLO_CONTROLS = ((pygame.K_LEFT, pygame.K_a), (pygame.K_RIGHT, pygame.K_d),
+                 (pygame.K_UP, pygame.K_w), (pygame.K_SPACE,))
+MAX_PLAYERS = len(CONTROLS)
+
+# Orb glow pulse frames and a pool of asteroid outlines per size, pre-rendered
+ORB_RADIUS = 8
+ORB_FRAMES = 16
+ASTEROID_RADII = {"large": 40, "medium": 20, "small": 10}
+ASTEROID_SHAPES = 8
+
+def render_orb_frames():
+    # Glow rings and core for pulse 0..3, composited with premultiplied alpha so
+    # the frame blends onto the scene like the rings drawn one by one would
+    cell = cell_size(ORB_RADIUS + 3)
+    center = cell // 2
+    sheet = pygame.Surface((cell * ORB_FRAMES, cell), pygame.SRCALPHA)
+    for frame in range(ORB_FRAMES):
+        target = sheet.subsurface((frame * cell, 0, cell, cell))
+        pulse = frame / (ORB_FRAMES - 1) * 3
+        color_intensity = min(255, 100 + int(pulse * 50))
+        for r in range(int(ORB_RADIUS + pulse), int(ORB_RADIUS - 2 + pulse), -1):
+            alpha = int(150 * (r - ORB_RADIUS + 2) / (pulse + 2))
+            ring = pygame.Surface((r * 2, r * 2), pygame.SRCALPHA)
+            pygame.draw.circle(ring, (0, color_intensity, color_intensity, alpha), (r, r), r)
+            target.blit(ring.premul_alpha(), (center - r, center - r),
+                        special_flags=pygame.BLEND_PREMULTIPLIED)
+        pygame.draw.circle(target, (200, 255, 255), (center, center), ORB_RADIUS - 2)
+    return sheet
+
+def render_asteroids(radius):
+    # Random outlines with 8-12 vertices, the same ones on every start
+    rng = random.Random(radius)
+    cell = cell_size(radius * 1.2)
+    sheet = pygame.Surface((cell * ASTEROID_SHAPES, cell))
+    sheet.fill(COLORKEY)
+    for shape in range(ASTEROID_SHAPES):
+        center = (shape * cell + cell // 2, cell // 2)
+        num_vertices = rng.randint(8, 12)
+        points = []
+        for i in range(num_vertices):
+            angle = math.pi * 2 * i / num_vertices
+            distance = radius * rng.uniform(0.8, 1.2)
+            points.append((center[0] + math.cos(angle) * distance, center[1] + math.sin(angle) * distance))
+        pygame.draw.polygon(sheet, WHITE, points, 1)
+    return sheet
+
+# Pre-rendered sheets come from the on-disk cache, which is rebuilt whenever
+# this script or the shared drawing code changes
+hud_font = pygame.font.SysFont('Arial', 24)
+sprite_cache = AssetCache("as-sonnet", [__file__], extra=(pygame.font.match_font("arial"),))
+sheets = sprite_cache.load({
+    "orb": render_orb_frames,
+    **{f"asteroid {size}": (lambda radius=radius: render_asteroids(radius))
+       for size, radius in ASTEROID_RADII.items()},
+    **{f"ship {i}": (lambda color=color: RotationAtlas.render(ship_variants(color), SHIP_SIZE, 4))
+       for i, color in enumerate(PLAYER_COLORS)},
+    **{f"glyphs {i}": (lambda color=color: GlyphAtlas.render(hud_font, color))
+       for i, color in enumerate(PLAYER_COLORS)},
+})
+orb_frames = strip(sheets["orb"], ORB_FRAMES, colorkey=False)
+asteroid_sprites = {size: strip(sheets[f"asteroid {size}"], ASTEROID_SHAPES) for size in ASTEROID_RADII}
+hud_glyphs = {color: GlyphAtlas(hud_font, color, sheets[f"glyphs {i}"])
+              for i, color in enumerate(PLAYER_COLORS)}
+ship_atlases = {}
+
+def ship_atlas(color):
+    # Converting the cells of an atlas costs a little, so only colors in play get one
+    if color not in ship_atlases:
+        sheet = sheets[f"ship {PLAYER_COLORS.index(color)}"]
+        ship_atlases[color] = RotationAtlas(ship_variants(color), SHIP_SIZE, 4, sheet)
+    return ship_atlases[color]
+
+# Headless and muted runs do not even open the mixer
+audio = Audio(EFFECTS, VOICES, enabled="--headless" not in sys.argv and "--mute" not in sys.argv)
+
+# Collision layers, and the pairs that collide in the order their events are resolved
+(SHIP_LAYER, SHOT_LAYER, ENEMY_SHOT_LAYER,
+ ASTEROID_LAYER, SAUCER_LAYER, ORB_LAYER) = (1 << i for i in range(6))
+COLLISION_RULES = [
+    (SHIP_LAYER, ASTEROID_LAYER, "ship_asteroid"),
+    (SHOT_LAYER, ASTEROID_LAYER, "shot_asteroid"),
+    (SHIP_LAYER, ORB_LAYER, "orb_pickup"),
+    (SHIP_LAYER, SAUCER_LAYER, "ship_saucer"),
+    (SHOT_LAYER, SAUCER_LAYER, "shot_saucer"),
+    (SHIP_LAYER, ENEMY_SHOT_LAYER, "ship_enemy_shot"),
+]
+
+def spawn_point(index, count):
+    # Single player starts in the center, several players on a ring around it
+    if count == 1:
+        return [WIDTH // 2, HEIGHT // 2]
+    angle = math.pi + 2 * math.pi * index / count
+    return [WIDTH // 2 + math.cos(angle) * 150, HEIGHT // 2 + math.sin(angle) * 150]
+
+def freeze(entity):
+    # Shallow copy with its own position, safe to draw while the original keeps moving
+    snapshot = copy.copy(entity)
+    snapshot.position = tuple(entity.position)
+    return snapshot
+
 # Player class
 class Player:
-    def __init__(self):
-        self.position = [WIDTH // 2, HEIGHT // 2]
+    def __init__(self, index=0, count=1):
+        self.index = index
+        self.spawn = spawn_point(index, count)
+        self.position = list(self.spawn)
         self.velocity = [0, 0]
         self.acceleration = 0.1
         self.max_velocity = 5
         self.friction = 0.98
         self.angle = 0
         self.rotation_speed = 4
-        self.size = 15
-        self.color = WHITE
-        self.trail = []  # Store positions for the tail
+        self.size = SHIP_SIZE
+        self.color = PLAYER_COLORS[index]
+        self.controls = SOLO_CONTROLS if count == 1 else CONTROLS[index][1]
+        self.trail = TailLOD(WIDTH, HEIGHT)  # Store positions for the tail, older parts simplified
         self.trail_length = 0  # Increases as player collects orbs
         self.trail_spacing = 5  # Store every nth position
         self.frame_counter = 0
@@ -44,7 +211,9 @@ class Player:
         self.invulnerable = 180  # 3 seconds of invulnerability at start
         self.lives = 3
         self.score = 0
-        self.tail_color = (0, 200, 200)  # Cyan-ish color for the tail
+        self.tail_gradient = TAIL_GRADIENTS[index]  # Oldest to newest tail color
+        self.tail_layer = TailLayer((WIDTH, HEIGHT))  # Long tails are drawn from a cached layer
+        self.thrusting = False  # Set by thrust() during this frame's input stage
         
     def update(self):
         # Apply velocity
@@ -69,10 +238,9 @@ class Player:
         # Update tail
         self.frame_counter += 1
         if self.frame_counter % self.trail_spacing == 0:
-            self.trail.append(self.position.copy())
+            self.trail.append(tuple(self.position))
             # Limit trail to actual tail length
-            while len(self.trail) > self.trail_length:
-                self.trail.pop(0)
+            self.trail.trim(self.trail_length)
         
         # Update shoot cooldown
         if self.shoot_cooldown > 0:
@@ -88,9 +256,9 @@ class Player:
     
     def thrust(self):
         # Apply acceleration in the direction of the ship's angle
-        angle_rad = math.radians(self.angle)
-        self.velocity[0] += math.cos(angle_rad) * self.acceleration
-        self.velocity[1] -= math.sin(angle_rad) * self.acceleration
+        self.thrusting = True
+        self.velocity[0] += COS[self.angle] * self.acceleration
+        self.velocity[1] -= SIN[self.angle] * self.acceleration
         
         # Limit maximum velocity
         velocity_magnitude = math.sqrt(self.velocity[0]**2 + self.velocity[1]**2)
@@ -99,97 +267,71 @@ class Player:
             self.velocity[0] *= scale
             self.velocity[1] *= scale
     
+    def steer(self, keys, bullets):
+        # Applies this player's keys from the keyboard sample
+        left, right, thrust, shoot = self.controls
+        if any(keys[key] for key in left):
+            self.rotate(1)
+        if any(keys[key] for key in right):
+            self.rotate(-1)
+        if any(keys[key] for key in thrust):
+            self.thrust()
+        if any(keys[key] for key in shoot):
+            self.shoot(bullets)
+    
     def shoot(self, bullets):
         if self.shoot_cooldown <= 0:
-            angle_rad = math.radians(self.angle)
+            cos, sin = COS[self.angle], SIN[self.angle]
             bullet_velocity = [
-                math.cos(angle_rad) * 10 + self.velocity[0],
-                -math.sin(angle_rad) * 10 + self.velocity[1]
+                cos * 10 + self.velocity[0],
+                -sin * 10 + self.velocity[1]
             ]
             bullet_pos = [
-                self.position[0] + math.cos(angle_rad) * self.size,
-                self.position[1] - math.sin(angle_rad) * self.size
+                self.position[0] + cos * self.size,
+                self.position[1] - sin * self.size
             ]
-            bullets.append(Bullet(bullet_pos, bullet_velocity, "player"))
+            bullets.append(Bullet(bullet_pos, bullet_velocity, "player", shooter=self))
+            audio.play("shot")
             self.shoot_cooldown = 15  # 1/4 second cooldown between shots
     
     def collect_orb(self):
         self.trail_length += 20  # Increase tail length
         self.score += 50  # Increase score
     
-    def check_tail_collision(self):
-        # Skip first few segments as they're too close to the player
-        # Also skip if player is invulnerable
-        if self.invulnerable > 0 or len(self.trail) < 20:
-            return False
-            
-        player_rect = pygame.Rect(
-            self.position[0] - self.size/2, 
-            self.position[1] - self.size/2,
-            self.size, self.size
-        )
-        
-        # Check collision with tail segments (skip recent segments)
-        for i, pos in enumerate(self.trail[:-15]):  # Skip last 15 positions
-            segment_rect = pygame.Rect(pos[0] - 3, pos[1] - 3, 6, 6)
-            if player_rect.colliderect(segment_rect):
-                return True
-        return False
-    
-    def draw(self, surface):
+    def own_tail_skip(self):
+        # Newest tail points that cannot hit the ship itself: the last 15, or
+        # the whole tail while it is shorter than 20
+        return 15 if len(self.trail) >= 20 else len(self.trail)
+    
+    def tail_color(self, i, length):
+        # Gradient from the oldest to the newest end of the tail
+        t = min(1.0, i / length)
+        (r0, g0, b0), (r1, g1, b1) = self.tail_gradient
+        return (int(r0 + (r1 - r0) * t), int(g0 + (g1 - g0) * t), int(b0 + (b1 - b0) * t))
+    
+    def draw(self, canvas):
         # Draw the tail
-        for i, pos in enumerate(self.trail):
-            # Gradient color from blue to cyan based on position in tail
-            intensity = min(255, int(i / len(self.trail) * 255)) if self.trail else 0
-            color = (0, intensity, min(255, intensity + 100))
-            pygame.draw.circle(surface, color, (int(pos[0]), int(pos[1])), 3)
-        
-        # Calculate points for the triangular ship
-        angle_rad = math.radians(self.angle)
-        points = [
-            (
-                self.position[0] + math.cos(angle_rad) * self.size,
-                self.position[1] - math.sin(angle_rad) * self.size
-            ),
-            (
-                self.position[0] + math.cos(angle_rad + 2.5) * (self.size / 2),
-                self.position[1] - math.sin(angle_rad + 2.5) * (self.size / 2)
-            ),
-            (
-                self.position[0] + math.cos(angle_rad - 2.5) * (self.size / 2),
-                self.position[1] - math.sin(angle_rad - 2.5) * (self.size / 2)
-            )
-        ]
-        
-        # Draw ship (flashing if invulnerable)
-        if self.invulnerable == 0 or self.invulnerable % 10 < 5:
-            pygame.draw.polygon(surface, self.color, points)
-        
-        # Draw thrust effect when thrusting
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
-            thrust_points = [
-                (
-                    self.position[0] - math.cos(angle_rad) * (self.size / 2),
-                    self.position[1] + math.sin(angle_rad) * (self.size / 2)
-                ),
-                (
-                    self.position[0] + math.cos(angle_rad + 3) * (self.size / 3),
-                    self.position[1] - math.sin(angle_rad + 3) * (self.size / 3)
-                ),
-                (
-                    self.position[0] + math.cos(angle_rad - 3) * (self.size / 3),
-                    self.position[1] - math.sin(angle_rad - 3) * (self.size / 3)
-                )
-            ]
-            pygame.draw.polygon(surface, YELLOW, thrust_points)
+        length = len(self.trail)
+        # Older, simplified sections are drawn as one polyline per chunk
+        self.tail_layer.draw(canvas, self.trail, self.tail_color)
+        
+        # Full resolution points near the head
+        for i, pos in enumerate(self.trail.hot, self.trail.cold_count):
+            canvas.circle(self.tail_color(i, length), (int(pos[0]), int(pos[1])), 3)
+        
+        # Ship and flame come pre-rotated from the atlas (flashing if invulnerable)
+        visible = self.invulnerable == 0 or self.invulnerable % 10 < 5
+        if visible or self.thrusting:
+            variant = SHIP_FLAME if visible and self.thrusting else SHIP if visible else FLAME
+            ship_atlas(self.color).blit(canvas, self.position, self.angle, variant)
 
 # Bullet class
 class Bullet:
-    def __init__(self, position, velocity, owner, size=3):
+    def __init__(self, position, velocity, owner, size=3, shooter=None):
         self.position = position
         self.velocity = velocity
         self.owner = owner  # "player" or "enemy"
+        self.shooter = shooter  # Player who fired it, scores its hits
         self.size = size
         self.life = 60  # Bullets last for 60 frames (1 second)
     
@@ -212,15 +354,15 @@ class Bullet:
         # Decrease lifetime
         self.life -= 1
     
-    def draw(self, surface):
+    def draw(self, canvas):
         if self.owner == "player":
             color = GREEN
         else:
             color = RED
         
-        pygame.draw.circle(surface, color, 
-                          (int(self.position[0]), int(self.position[1])), 
-                          self.size)
+        canvas.circle(color, 
+                      (int(self.position[0]), int(self.position[1])), 
+                      self.size)
 
 # Asteroid class
 class Asteroid:
@@ -249,23 +391,16 @@ class Asteroid:
         self.size = size
         
         # Set asteroid radius based on size
+        self.radius = ASTEROID_RADII[size]
         if size == "large":
-            self.radius = 40
             self.points = 20
         elif size == "medium":
-            self.radius = 20
             self.points = 50
         else:  # small
-            self.radius = 10
             self.points = 100
         
-        # Generate a random shape for the asteroid
-        self.vertices = []
-        num_vertices = random.randint(8, 12)
-        for i in range(num_vertices):
-            angle = math.pi * 2 * i / num_vertices
-            distance = self.radius * random.uniform(0.8, 1.2)
-            self.vertices.append((math.cos(angle) * distance, math.sin(angle) * distance))
+        # Pick a random shape from the pre-rendered ones
+        self.shape = random.randrange(ASTEROID_SHAPES)
     
     def update(self):
         # Move asteroid
@@ -311,10 +446,11 @@ class Asteroid:
         
         return new_asteroids
     
-    def draw(self, surface):
+    def draw(self, canvas):
         # Draw the asteroid
-        points = [(self.position[0] + x, self.position[1] + y) for x, y in self.vertices]
-        pygame.draw.polygon(surface, WHITE, points, 1)
+        image = asteroid_sprites[self.size][self.shape]
+        canvas.blit(image, (int(self.position[0]) - image.get_width() // 2,
+                            int(self.position[1]) - image.get_height() // 2))
 
 # Orb (energy) class
 class Orb:
@@ -328,54 +464,56 @@ class Orb:
         else:
             self.position = position
         
-        self.radius = 8
+        self.radius = ORB_RADIUS
         self.pulse_timer = 0
     
     def update(self):
         self.pulse_timer += 0.1
     
-    def draw(self, surface):
-        # Pulsating effect
-        pulse = abs(math.sin(self.pulse_timer)) * 3
-        color_intensity = min(255, 100 + int(pulse * 50))
-        
-        # Draw outer glow
-        for r in range(int(self.radius + pulse), int(self.radius - 2 + pulse), -1):
-            alpha = int(150 * (r - self.radius + 2) / (pulse + 2))
-            s = pygame.Surface((r * 2, r * 2), pygame.SRCALPHA)
-            pygame.draw.circle(s, (0, color_intensity, color_intensity, alpha), (r, r), r)
-            surface.blit(s, (self.position[0] - r, self.position[1] - r))
-        
-        # Draw core
-        pygame.draw.circle(surface, (200, 255, 255), 
-                          (int(self.position[0]), int(self.position[1])), 
-                          int(self.radius - 2))
+    def draw(self, canvas):
+        # Pulsating glow and core, from the pre-rendered frames
+        pulse = abs(math.sin(self.pulse_timer))
+        image = orb_frames[round(pulse * (ORB_FRAMES - 1))]
+        half = image.get_width() // 2
+        canvas.blit(image, (int(self.position[0]) - half, int(self.position[1]) - half),
+                    special_flags=pygame.BLEND_PREMULTIPLIED)
 
 # Enemy Saucer class
 class Saucer:
-    def __init__(self, difficulty=1):
+    def __init__(self, difficulty=1, position=None):
         # Start from a random edge
-        side = random.randint(0, 3)
-        if side == 0:  # Top
-            position = [random.randint(0, WIDTH), 0]
-        elif side == 1:  # Right
-            position = [WIDTH, random.randint(0, HEIGHT)]
-        elif side == 2:  # Bottom
-            position = [random.randint(0, WIDTH), HEIGHT]
-        else:  # Left
-            position = [0, random.randint(0, HEIGHT)]
+        if position is None:
+            side = random.randint(0, 3)
+            if side == 0:  # Top
+                position = [random.randint(0, WIDTH), 0]
+            elif side == 1:  # Right
+                position = [WIDTH, random.randint(0, HEIGHT)]
+            elif side == 2:  # Bottom
+                position = [random.randint(0, WIDTH), HEIGHT]
+            else:  # Left
+                position = [0, random.randint(0, HEIGHT)]
         
         self.position = position
         self.angle = random.uniform(0, 2 * math.pi)
         self.speed = 2
         self.velocity = [math.cos(self.angle) * self.speed, math.sin(self.angle) * self.speed]
-        self.radius = 15
+        self.radius = SAUCER_RADIUS
         self.shoot_cooldown = random.randint(30, 90)  # Time until first shot
         self.difficulty = difficulty  # Higher difficulty = more accurate shots
         self.points = 150
         self.change_dir_timer = random.randint(60, 180)  # 1-3 seconds
     
-    def update(self, player_pos, bullets):
+    def steering_input(self):
+        # What the batched saucer AI needs from this saucer
+        return (self.position[0], self.position[1], self.velocity[0], self.velocity[1],
+                self.speed, math.cos(self.angle), math.sin(self.angle))
+    
+    def update(self, plan, bullets):
+        # plan comes from SaucerAI: desired velocity and a unit vector to aim along
+        desired_vx, desired_vy, aim_x, aim_y = plan
+        self.velocity[0], self.velocity[1] = steer(
+            self.velocity[0], self.velocity[1], desired_vx, desired_vy, 0.15)
+        
         # Move saucer
         self.position[0] += self.velocity[0]
         self.position[1] += self.velocity[1]
@@ -391,237 +529,373 @@ class Saucer:
         elif self.position[1] > HEIGHT:
             self.position[1] = 0
         
-        # Occasionally change direction
+        # Occasionally change the wander direction
         self.change_dir_timer -= 1
         if self.change_dir_timer <= 0:
             self.angle = random.uniform(0, 2 * math.pi)
-            self.velocity = [math.cos(self.angle) * self.speed, math.sin(self.angle) * self.speed]
             self.change_dir_timer = random.randint(60, 180)
         
         # Shoot at player
         self.shoot_cooldown -= 1
         if self.shoot_cooldown <= 0:
-            self.shoot(player_pos, bullets)
+            self.shoot(aim_x, aim_y, bullets)
             self.shoot_cooldown = random.randint(60, 120)  # 1-2 seconds between shots
     
-    def shoot(self, player_pos, bullets):
-        # Calculate angle to player
-        dx = player_pos[0] - self.position[0]
-        dy = player_pos[1] - self.position[1]
-        angle = math.atan2(dy, dx)
+    def shoot(self, aim_x, aim_y, bullets):
+        # Aim where the player will be when the bullet arrives
+        angle = math.atan2(aim_y, aim_x)
         
         # Add some inaccuracy based on difficulty
         accuracy_factor = 0.2 / self.difficulty  # Higher difficulty = less deviation
         angle += random.uniform(-accuracy_factor, accuracy_factor)
         
         # Create bullet
-        velocity = [math.cos(angle) * 5, math.sin(angle) * 5]
+        velocity = [math.cos(angle) * SAUCER_BULLET_SPEED, math.sin(angle) * SAUCER_BULLET_SPEED]
         bullets.append(Bullet(self.position.copy(), velocity, "enemy", 2))
+        audio.play("enemy shot")
     
-    def draw(self, surface):
+    def draw(self, canvas):
         # Draw the saucer body
-        pygame.draw.ellipse(surface, WHITE, 
-                           (self.position[0] - self.radius, self.position[1] - self.radius/2,
-                            self.radius * 2, self.radius))
+        canvas.ellipse(WHITE, 
+                       (self.position[0] - self.radius, self.position[1] - self.radius/2,
+                        self.radius * 2, self.radius))
         
         # Draw the cabin
-        pygame.draw.ellipse(surface, WHITE,
-                           (self.position[0] - self.radius/2, self.position[1] - self.radius,
-                            self.radius, self.radius/2))
+        canvas.ellipse(WHITE,
+                       (self.position[0] - self.radius/2, self.position[1] - self.radius,
+                        self.radius, self.radius/2))
 
 # Game state management
 class Game:
-    def __init__(self):
-        self.state = "menu"  # menu, playing, game_over
-        self.player = Player()
+    def __init__(self, players=1):
+        self.state = "menu"  # menu, playing, paused, game_over
+        self.player_count = players
+        self.players = [Player(i, players) for i in range(players)]
+        # Every tail in one grid, so a head only checks the tail segments around it
+        self.tails = TailIndex(WIDTH, HEIGHT)
+        self.split = SplitScreen(players, WIDTH, HEIGHT) if players > 1 else None
         self.bullets = []
         self.asteroids = []
         self.orbs = []
         self.saucers = []
-        self.asteroid_spawn_timer = 60*6  # seconds
-        self.orb_spawn_timer = 300  # 5 seconds
-        self.saucer_spawn_timer = 1200  # 20 seconds
+        self.tick = 0
+        self.spawner = SpawnPlanner(WIDTH, HEIGHT, self.block_spawns)
+        self.saucer_ai = SaucerAI(WIDTH, HEIGHT, SAUCER_BULLET_SPEED)
+        self.collisions = CollisionStage(WIDTH, HEIGHT, COLLISION_RULES)
+        # Spawn timing per level comes from waves.json
+        self.waves = WaveScheduler(
+            load_waves("as-sonnet"),
+            {"asteroid": self.spawn_asteroid, "orb": self.spawn_orb, "saucer": self.spawn_saucer},
+            {"asteroid": lambda: len(self.asteroids), "orb": lambda: len(self.orbs),
+             "saucer": lambda: len(self.saucers)})
         self.level = 1
+        self.leaderboard = Leaderboard("as-sonnet")
+        self.record_scores = True  # Off while the bot plays, its runs stay off the board
         self.high_score = 0
-        self.font = pygame.font.SysFont('Arial', 24)
+        self.run_start = pygame.time.get_ticks()
+        self.paused_at = 0
+        self.font = hud_font
         self.big_font = pygame.font.SysFont('Arial', 48)
+        self.small_font = pygame.font.SysFont('Arial', 18)
+    
+    @property
+    def player(self):
+        # The first player, the only one in single player games and the one the bot drives
+        return self.players[0]
+    
+    def alive(self):
+        return [player for player in self.players if player.lives > 0]
     
     def reset(self):
-        self.player = Player()
+        self.players = [Player(i, self.player_count) for i in range(self.player_count)]
+        self.tails.clear()
         self.bullets = []
         self.asteroids = []
         self.orbs = []
         self.saucers = []
-        self.asteroid_spawn_timer = 180
-        self.orb_spawn_timer = 300
-        self.saucer_spawn_timer = 1200
-        
-        # Add initial asteroids
-        for _ in range(4):
-            self.asteroids.append(Asteroid())
+        self.tick = 0
+        self.waves.reset()  # Also schedules the initial asteroids
+        self.run_start = pygame.time.get_ticks()
+        # The leaderboard loads in the background, pick up its best score once ready
+        self.high_score = max(self.high_score, self.leaderboard.high_score)
     
     def update(self):
         if self.state == "playing":
-            # Update player
-            self.player.update()
+            # Move everything first, then find and resolve all collisions at once
+            for player in self.alive():
+                player.update()
             
-            # Check for tail collision
-            if self.player.check_tail_collision():
-                self.player_hit()
-            
-            # Update bullets
-            for bullet in self.bullets[:]:
+            for bullet in self.bullets:
                 bullet.update()
-                
-                # Remove expired bullets
-                if bullet.life <= 0:
-                    self.bullets.remove(bullet)
+            self.bullets = [bullet for bullet in self.bullets if bullet.life > 0]
             
-            # Update asteroids
-            for asteroid in self.asteroids[:]:
+            for asteroid in self.asteroids:
                 asteroid.update()
-                
-                # Check for collision with player
-                if self.player.invulnerable <= 0:
-                    dx = asteroid.position[0] - self.player.position[0]
-                    dy = asteroid.position[1] - self.player.position[1]
-                    distance = math.sqrt(dx**2 + dy**2)
-                    if distance < asteroid.radius + self.player.size / 2:
-                        self.player_hit()
-                        break  # Exit loop as player state has changed
-                
-                # Check for collision with bullets
-                for bullet in self.bullets[:]:
-                    if bullet.owner == "player":  # Only player bullets destroy asteroids
-                        dx = asteroid.position[0] - bullet.position[0]
-                        dy = asteroid.position[1] - bullet.position[1]
-                        distance = math.sqrt(dx**2 + dy**2)
-                        
-                        if distance < asteroid.radius + bullet.size:
-                            # Create new asteroids based on size
-                            new_asteroids = asteroid.split()
-                            self.asteroids.extend(new_asteroids)
-                            
-                            # Score points
-                            self.player.score += asteroid.points
-                            
-                            # Remove the asteroid and bullet
-                            if asteroid in self.asteroids:
-                                self.asteroids.remove(asteroid)
-                            if bullet in self.bullets:
-                                self.bullets.remove(bullet)
-                            break
             
-            # Update orbs
-            for orb in self.orbs[:]:
+            for orb in self.orbs:
                 orb.update()
-                
-                # Check for collision with player
-                dx = orb.position[0] - self.player.position[0]
-                dy = orb.position[1] - self.player.position[1]
-                distance = math.sqrt(dx**2 + dy**2)
-                
-                if distance < orb.radius + self.player.size / 2:
-                    self.player.collect_orb()
-                    self.orbs.remove(orb)
-            
-            # Update saucers
-            for saucer in self.saucers[:]:
-                saucer.update(self.player.position, self.bullets)
-                
-                # Check for collision with player
-                if self.player.invulnerable <= 0:
-                    dx = saucer.position[0] - self.player.position[0]
-                    dy = saucer.position[1] - self.player.position[1]
-                    distance = math.sqrt(dx**2 + dy**2)
-                    
-                    if distance < saucer.radius + self.player.size / 2:
-                        self.player_hit()
-                        if saucer in self.saucers:
-                            self.saucers.remove(saucer)
-                        break
-                
-                # Check for collision with bullets
-                for bullet in self.bullets[:]:
-                    if bullet.owner == "player":  # Only player bullets destroy saucers
-                        dx = saucer.position[0] - bullet.position[0]
-                        dy = saucer.position[1] - bullet.position[1]
-                        distance = math.sqrt(dx**2 + dy**2)
-                        
-                        if distance < saucer.radius + bullet.size:
-                            # Score points
-                            self.player.score += saucer.points
-                            
-                            # Remove the saucer and bullet
-                            if saucer in self.saucers:
-                                self.saucers.remove(saucer)
-                            if bullet in self.bullets:
-                                self.bullets.remove(bullet)
-                            break
-                            
-                # Check if player is hit by saucer bullets
-                for bullet in self.bullets[:]:
-                    if bullet.owner == "enemy" and self.player.invulnerable <= 0:
-                        dx = self.player.position[0] - bullet.position[0]
-                        dy = self.player.position[1] - bullet.position[1]
-                        distance = math.sqrt(dx**2 + dy**2)
-                        
-                        if distance < self.player.size / 2 + bullet.size:
-                            self.player_hit()
-                            if bullet in self.bullets:
-                                self.bullets.remove(bullet)
-                            break
-                            
-            # Spawn new game objects
-            self.asteroid_spawn_timer -= 1
-            if self.asteroid_spawn_timer <= 0 and len(self.asteroids) < 10 + self.level:
-                self.asteroids.append(Asteroid())
-                self.asteroid_spawn_timer = 300 - self.level * 10  # Spawn faster as levels increase
             
-            self.orb_spawn_timer -= 1
-            if self.orb_spawn_timer <= 0 and len(self.orbs) < 5:
-                self.orbs.append(Orb())
-                self.orb_spawn_timer = 300  # 5 seconds
+            # Update saucers, steering and aiming for all of them in one batched pass
+            plans = self.saucer_ai.plan(
+                [saucer.steering_input() for saucer in self.saucers],
+                [(a.position[0], a.position[1], a.radius) for a in self.asteroids],
+                [(p.position[0], p.position[1], p.velocity[0], p.velocity[1]) for p in self.alive()])
+            for saucer, plan in zip(self.saucers, plans):
+                saucer.update(plan, self.bullets)
             
-            self.saucer_spawn_timer -= 1
-            if self.saucer_spawn_timer <= 0 and len(self.saucers) < 1 + self.level // 3:
-                self.saucers.append(Saucer(difficulty=min(5, 1 + self.level // 2)))
-                self.saucer_spawn_timer = 1200 - self.level * 50  # Spawn faster as levels increase
+            self.resolve(self.tail_collisions() + self.collide())
+                            
+            # Spawn new game objects (only does work when a wave is due)
+            self.tick += 1
+            self.spawner.invalidate()
+            self.waves.advance(self.tick, self.level)
                 
-            # Check for level advancement
-            if self.player.score >= self.level * 1000:
+            # Check for level advancement, the best player sets the pace
+            best = max(player.score for player in self.players)
+            if best >= self.level * 1000:
                 self.level += 1
                 
             # Update high score
-            if self.player.score > self.high_score:
-                self.high_score = self.player.score
-    
-    def player_hit(self):
-        if self.player.invulnerable <= 0:
-            self.player.lives -= 1
-            if self.player.lives <= 0:
-                self.state = "game_over"
+            if best > self.high_score:
+                self.high_score = best
+        
+        # Saucers hum while any are around, and the hum ends with the run
+        audio.loop("saucer hum", self.state == "playing" and bool(self.saucers))
+    
+    def tail_collisions(self):
+        # Every tail is lethal to every player, except for the newest points of a
+        # player's own tail. The tails are indexed together, not added to the stage.
+        self.tails.update({player.index: player.trail for player in self.players})
+        events = []
+        for player in self.alive():
+            owner = self.tails.hit(player.position[0], player.position[1], player.size / 2 + 3,
+                                   player.index, player.own_tail_skip())
+            if owner is not None:
+                events.append(Collision("ship_tail", player, self.players[owner]))
+        return events
+    
+    def collide(self):
+        # Every entity that can touch another goes into the collision stage once
+        stage = self.collisions
+        stage.clear()
+        for player in self.alive():
+            stage.add(player.position[0], player.position[1], player.size / 2, SHIP_LAYER, player)
+        for bullet in self.bullets:
+            layer = SHOT_LAYER if bullet.owner == "player" else ENEMY_SHOT_LAYER
+            stage.add(bullet.position[0], bullet.position[1], bullet.size, layer, bullet)
+        for asteroid in self.asteroids:
+            stage.add(asteroid.position[0], asteroid.position[1], asteroid.radius, ASTEROID_LAYER, asteroid)
+        for saucer in self.saucers:
+            stage.add(saucer.position[0], saucer.position[1], saucer.radius, SAUCER_LAYER, saucer)
+        for orb in self.orbs:
+            stage.add(orb.position[0], orb.position[1], orb.radius, ORB_LAYER, orb)
+        return stage.detect()
+    
+    def resolve(self, events):
+        # Applies collision events in order. A bullet, asteroid, saucer or orb is used
+        # up by its first event; later events involving it are dropped.
+        used = set()
+        for kind, first, second in events:
+            if self.state != "playing":
+                break  # The game ended, nothing else counts
+            if id(first) in used or id(second) in used:
+                continue
+            if kind in ("shot_asteroid", "shot_saucer"):
+                first.shooter.score += second.points
+                if kind == "shot_asteroid":
+                    self.asteroids.extend(second.split())
+                    audio.play(f"asteroid {second.size}")
+                else:
+                    audio.play("saucer down")
+                used.add(id(first))
+                used.add(id(second))
+            elif kind == "orb_pickup":
+                if first.lives > 0:
+                    first.collect_orb()
+                    audio.play("orb")
+                    used.add(id(second))
+            elif first.lives > 0 and first.invulnerable <= 0:
+                # A ship ran into a tail, an asteroid, a saucer or an enemy bullet
+                self.player_hit(first)
+                if kind in ("ship_saucer", "ship_enemy_shot"):
+                    used.add(id(second))
+        if used:
+            self.bullets = [bullet for bullet in self.bullets if id(bullet) not in used]
+            self.asteroids = [asteroid for asteroid in self.asteroids if id(asteroid) not in used]
+            self.saucers = [saucer for saucer in self.saucers if id(saucer) not in used]
+            self.orbs = [orb for orb in self.orbs if id(orb) not in used]
+    
+    # Spawners for the wave scheduler. Positions come from the spawn grid; when it
+    # finds no safe spot they return False and the wave is retried a little later
+    def spawn_asteroid(self, wave):
+        position = self.spawner.find_edge_position(clearance=ASTEROID_RADII["large"] + 20)
+        if position:
+            self.asteroids.append(Asteroid(position))
+        return bool(position)
+    
+    def spawn_orb(self, wave):
+        position = self.spawner.find_position(margin=50, spacing=150)
+        if position:
+            self.orbs.append(Orb(position))
+        return bool(position)
+    
+    def spawn_saucer(self, wave):
+        position = self.spawner.find_edge_position(clearance=SAUCER_RADIUS + 20)
+        if position:
+            self.saucers.append(Saucer(difficulty=min(5, 1 + self.level // 2), position=position))
+        return bool(position)
+    
+    def block_spawns(self, spawner):
+        # Everything the collision checks can kill a player with, plus room around the ships
+        for player in self.alive():
+            spawner.block(player.position[0], player.position[1], 150)
+        for asteroid in self.asteroids:
+            spawner.block(asteroid.position[0], asteroid.position[1], asteroid.radius + 20)
+        for saucer in self.saucers:
+            spawner.block(saucer.position[0], saucer.position[1], saucer.radius + 20)
+        for bullet in self.bullets:
+            if bullet.owner == "enemy":
+                spawner.block(bullet.position[0], bullet.position[1], 20)
+        for player in self.players:
+            for x, y in player.trail.lethal_points(spacing=spawner.grid.cell_size):
+                spawner.block(x, y, 15)
+        for orb in self.orbs:
+            spawner.keep_apart(orb.position[0], orb.position[1])
+    
+    def player_hit(self, player):
+        if player.invulnerable <= 0:
+            audio.play("player hit")
+            player.lives -= 1
+            player.trail.clear()  # Clear the tail on hit
+            if player.lives <= 0:
+                # Out of the game; the run ends with the last player standing
+                if not self.alive():
+                    self.state = "game_over"
+                    self.record_run()
             else:
-                self.player.invulnerable = 180  # 3 seconds of invulnerability
-                self.player.position = [WIDTH // 2, HEIGHT // 2]
-                self.player.velocity = [0, 0]
-                self.player.trail = []  # Clear the tail on hit
+                player.invulnerable = 180  # 3 seconds of invulnerability
+                player.position = list(player.spawn)
+                player.velocity = [0, 0]
+    
+    def pause(self):
+        if self.state == "playing":
+            self.state = "paused"
+            self.paused_at = pygame.time.get_ticks()
+            audio.pause()
+    
+    def resume(self):
+        if self.state == "paused":
+            self.state = "playing"
+            audio.resume()
+            # The recorded run duration leaves out the time spent paused
+            self.run_start += pygame.time.get_ticks() - self.paused_at
+    
+    def autopilot_step(self, autopilot):
+        # Feed the bot the same dangers the collision code checks, then apply its inputs
+        player = self.player
+        orbs = [(orb.position[0], orb.position[1]) for orb in self.orbs]
+        hazards = [(a.position[0], a.position[1], a.velocity[0], a.velocity[1], a.radius)
+                   for a in self.asteroids]
+        hazards += [(s.position[0], s.position[1], s.velocity[0], s.velocity[1], s.radius)
+                    for s in self.saucers]
+        bullets = [(b.position[0], b.position[1], b.velocity[0], b.velocity[1])
+                   for b in self.bullets if b.owner == "enemy"]
+        # Segments become lethal once 15 newer ones exist, which happens within the bot's lookahead
+        tail = player.trail.lethal_points(skip_recent=6, spacing=autopilot.grid.cell_size)
+        for other in self.players[1:]:
+            tail += other.trail.lethal_points(spacing=autopilot.grid.cell_size)
+        
+        action = autopilot.plan(player.position, player.velocity, player.angle,
+                                orbs, hazards, bullets, tail)
+        if action.turn:
+            player.rotate(action.turn)
+        if action.thrust:
+            player.thrust()
+        if action.shoot:
+            player.shoot(self.bullets)
+    
+    def snapshot(self):
+        # Copy of everything draw() reads, for the render thread
+        snapshot = copy.copy(self)
+        snapshot.players = []
+        for player in self.players:
+            frozen = freeze(player)
+            frozen.trail = player.trail.copy()
+            snapshot.players.append(frozen)
+        snapshot.bullets = [freeze(bullet) for bullet in self.bullets]
+        snapshot.asteroids = [freeze(asteroid) for asteroid in self.asteroids]
+        snapshot.orbs = [freeze(orb) for orb in self.orbs]
+        snapshot.saucers = [freeze(saucer) for saucer in self.saucers]
+        return snapshot
     
-    def draw(self, surface):
+    def record_run(self):
+        # Queued for the background writer, does not block the frame
+        if not self.record_scores:
+            return
+        duration = (pygame.time.get_ticks() - self.run_start) / 1000
+        for player in self.players:
+            self.leaderboard.submit(player.score, self.level, player.trail_length, duration)
+    
+    def draw_world(self, canvas):
+        # Draw game objects
+        for asteroid in self.asteroids:
+            asteroid.draw(canvas)
+        
+        for orb in self.orbs:
+            orb.draw(canvas)
+            
+        for bullet in self.bullets:
+            bullet.draw(canvas)
+        
+        for saucer in self.saucers:
+            saucer.draw(canvas)
+        
+        for player in self.alive():
+            player.draw(canvas)
+    
+    def draw_hud(self, canvas, player):
+        # Score, lives, high score and level in the corners of `canvas`, from pre-rendered glyphs
+        width = canvas.width
+        text = hud_glyphs[WHITE]
+        label = f"P{player.index + 1} " if self.player_count > 1 else ""
+        hud_glyphs[player.color].blit(canvas, f"{label}Score: {player.score}", (10, 10))
+        
+        # High score
+        high_score = f"High Score: {self.high_score}"
+        text.blit(canvas, high_score, (width - text.width(high_score) - 10, 10))
+        
+        # Lives
+        text.blit(canvas, f"Lives: {player.lives}" if player.lives > 0 else "OUT", (10, 40))
+        
+        # Level
+        level = f"Level: {self.level}"
+        text.blit(canvas, level, (width - text.width(level) - 10, 40))
+    
+    def draw(self, canvas):
         # Clear screen
-        surface.fill(BLACK)
+        canvas.fill(BLACK)
         
         if self.state == "menu":
             # Draw title
             title_text = self.big_font.render("ASTERSNAKE", True, WHITE)
-            surface.blit(title_text, (WIDTH//2 - title_text.get_width()//2, HEIGHT//4))
+            canvas.blit(title_text, (WIDTH//2 - title_text.get_width()//2, HEIGHT//4))
             
             # Draw instructions
-            instructions = [
-                "Arrow Keys or WASD to move",
-                "SPACE to shoot",
-                "Collect orbs to grow your tail",
-                "Avoid asteroids, saucers, and your own tail",
+            if self.player_count == 1:
+                instructions = [
+                    "Arrow Keys or WASD to move",
+                    "SPACE to shoot",
+                    "Collect orbs to grow your tail",
+                    "Avoid asteroids, saucers, and your own tail",
+                ]
+            else:
+                instructions = [f"P{i + 1}: {CONTROLS[i][0]}" for i in range(self.player_count)]
+                instructions += [
+                    "Collect orbs to grow your tail",
+                    "Avoid asteroids, saucers, and every tail",
+                ]
+            instructions += [
+                "P to pause",
                 "",
                 "Press ENTER to start"
             ]
@@ -629,106 +903,295 @@ class Game:
             y_pos = HEIGHT//2
             for line in instructions:
                 text = self.font.render(line, True, WHITE)
-                surface.blit(text, (WIDTH//2 - text.get_width()//2, y_pos))
+                canvas.blit(text, (WIDTH//2 - text.get_width()//2, y_pos))
                 y_pos += 30
         
-        elif self.state == "playing":
-            # Draw game objects
-            for asteroid in self.asteroids:
-                asteroid.draw(surface)
-            
-            for orb in self.orbs:
-                orb.draw(surface)
-                
-            for bullet in self.bullets:
-                bullet.draw(surface)
-            
-            for saucer in self.saucers:
-                saucer.draw(surface)
-            
-            self.player.draw(surface)
-            
-            # Draw HUD
-            # Score
-            score_text = self.font.render(f"Score: {self.player.score}", True, WHITE)
-            surface.blit(score_text, (10, 10))
-            
-            # High score
-            high_score_text = self.font.render(f"High Score: {self.high_score}", True, WHITE)
-            surface.blit(high_score_text, (WIDTH - high_score_text.get_width() - 10, 10))
-            
-            # Lives
-            lives_text = self.font.render(f"Lives: {self.player.lives}", True, WHITE)
-            surface.blit(lives_text, (10, 40))
+        elif self.state in ("playing", "paused"):
+            if self.split:
+                # Draw the world once, then show it around each player in their viewport
+                world = self.split.world_canvas(canvas)
+                world.fill(BLACK)
+                self.draw_world(world)
+                for player, (view, _) in zip(self.players, self.split.views(canvas)):
+                    self.split.show(view, player.position)
+                    self.draw_hud(view, player)
+                self.split.draw_overview(canvas)
+                self.split.draw_borders(canvas, (80, 80, 80))
+            else:
+                self.draw_world(canvas)
+                self.draw_hud(canvas, self.player)
             
-            # Level
-            level_text = self.font.render(f"Level: {self.level}", True, WHITE)
-            surface.blit(level_text, (WIDTH - level_text.get_width() - 10, 40))
+            if self.state == "paused":
+                paused_text = self.big_font.render("PAUSED", True, WHITE)
+                canvas.blit(paused_text, (WIDTH//2 - paused_text.get_width()//2, HEIGHT//3))
+                resume_text = self.font.render("Press P to resume", True, WHITE)
+                canvas.blit(resume_text, (WIDTH//2 - resume_text.get_width()//2, HEIGHT//3 + 70))
         
         elif self.state == "game_over":
             # Draw game over screen
             game_over_text = self.big_font.render("GAME OVER", True, RED)
-            surface.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//3))
+            canvas.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//6))
             
-            score_text = self.font.render(f"Score: {self.player.score}", True, WHITE)
-            surface.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2))
+            if self.player_count == 1:
+                score_line = f"Score: {self.player.score}"
+            else:
+                score_line = "   ".join(f"P{player.index + 1}: {player.score}" for player in self.players)
+            score_text = self.font.render(score_line, True, WHITE)
+            canvas.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//6 + 70))
             
             high_score_text = self.font.render(f"High Score: {self.high_score}", True, WHITE)
-            surface.blit(high_score_text, (WIDTH//2 - high_score_text.get_width()//2, HEIGHT//2 + 30))
+            canvas.blit(high_score_text, (WIDTH//2 - high_score_text.get_width()//2, HEIGHT//6 + 100))
+            
+            # Leaderboard (served from the in-memory cache)
+            y_pos = HEIGHT//6 + 150
+            for rank, entry in enumerate(self.leaderboard.top, 1):
+                line = (f"{rank:2}.  {entry.score:6}   Level {entry.level:2}   "
+                        f"Tail {entry.tail_length:4}   {int(entry.duration) // 60}:{int(entry.duration) % 60:02}")
+                text = self.small_font.render(line, True, WHITE)
+                canvas.blit(text, (WIDTH//2 - text.get_width()//2, y_pos))
+                y_pos += 22
             
             restart_text = self.font.render("Press ENTER to restart", True, WHITE)
-            surface.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, HEIGHT//2 + 80))
+            canvas.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, HEIGHT - 60))
 
-# Main game loop
-def main():
-    game = Game()
+def parse_args():
+    parser = argparse.ArgumentParser(description="Astersnake")
+    parser.add_argument("--autopilot", action="store_true",
+                        help="let the bot play (restarts automatically, for soak tests)")
+    parser.add_argument("--bot-budget-us", type=int,
+                        help="autopilot planning budget per frame in microseconds "
+                             "(default 2000; soak tests measure it, tracemalloc slows planning down)")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the simulation without drawing or frame rate cap")
+    parser.add_argument("--soak", type=float, metavar="SECONDS",
+                        help="soak test: let the bot play for SECONDS while tracking memory")
+    parser.add_argument("--soak-interval", type=float, default=60, metavar="SECONDS",
+                        help="time between soak memory samples")
+    parser.add_argument("--soak-max-growth-mb", type=float, default=32,
+                        help="fail the soak test if memory grows by more than this")
+    parser.add_argument("--window-scale", type=float, default=1.0,
+                        help="window size relative to the %dx%d playfield (F9/F10 at runtime)" % (WIDTH, HEIGHT))
+    parser.add_argument("--render-scale", type=float, default=1.0,
+                        help="draw at this fraction of the %dx%d resolution and scale up, "
+                             "for slow machines (F6/F7 at runtime)" % (WIDTH, HEIGHT))
+    parser.add_argument("--smooth", action="store_true",
+                        help="use smoothscale when the window is scaled (F8 at runtime)")
+    parser.add_argument("--fullscreen", action="store_true",
+                        help="start fullscreen (F11 at runtime)")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run the simulation on its own thread at a fixed tick rate")
+    parser.add_argument("--stats", action="store_true",
+                        help="print tick and frame time statistics on exit")
+    parser.add_argument("--busy-loop", action="store_true",
+                        help="pace frames with clock.tick_busy_loop (steadier, keeps a core busy)")
+    parser.add_argument("--latency", action="store_true",
+                        help="print key press to display flip latency on exit")
+    parser.add_argument("--mute", action="store_true",
+                        help="start without sound")
+    parser.add_argument("--players", type=int, default=1, choices=range(1, MAX_PLAYERS + 1),
+                        help="local split-screen players (each with their own keys)")
+    parser.add_argument("--record", metavar="DIR",
+                        help="save drawn frames to DIR as an image sequence, encoded in the background")
+    parser.add_argument("--record-format", choices=FORMATS, default="png",
+                        help="frame files: png, or raw RGB24 (larger, cheapest to write)")
+    parser.add_argument("--record-every", type=int, default=1, metavar="N",
+                        help="only record every Nth frame")
+    args = parser.parse_args()
+    if args.record and args.headless:
+        parser.error("--record saves drawn frames, headless runs draw nothing")
+    if args.record_every < 1:
+        parser.error("--record-every must be at least 1")
+    if not 0.25 <= args.render_scale <= 1:
+        parser.error("--render-scale must be between 0.25 and 1")
+    return args
+
+def handle_event(game, event, autopilot=None):
+    if event.type == pygame.KEYDOWN:
+        if event.key == pygame.K_RETURN:
+            if game.state == "menu" or game.state == "game_over":
+                game.state = "playing"
+                game.reset()
+        elif event.key == pygame.K_ESCAPE:
+            if game.state == "playing" or game.state == "paused":
+                game.state = "menu"
+                audio.stop()
+        elif event.key == pygame.K_p:
+            if game.state == "paused":
+                game.resume()
+            else:
+                game.pause()
+    elif event.type == pygame.WINDOWFOCUSLOST and autopilot is None:
+        # Nobody is watching, stop the run instead of letting it play out
+        game.pause()
+
+def is_idle(game, autopilot=None):
+    # Screens that only change on input; the bot never waits on the menu or game over
+    return game.state == "paused" or (game.state != "playing" and autopilot is None)
+
+def view(game):
+    # Everything a static screen shows that can change without an event
+    return game.state, game.high_score, game.leaderboard.top
+
+def step(game, keys, autopilot=None):
+    # One simulation tick: apply input, then update. `keys` is the one keyboard
+    # sample for this tick, taken right after the event pump.
+    # The bot starts a new run whenever the previous one ends
+    if autopilot and game.state in ("menu", "game_over"):
+        game.state = "playing"
+        game.reset()
+    
+    # Process input, the bot drives the first player and the keyboard everyone else
+    for player in game.players:
+        player.thrusting = False
+    if game.state == "playing":
+        humans = game.alive()
+        if autopilot and game.player.lives > 0:
+            game.autopilot_step(autopilot)
+            humans.remove(game.player)
+        if keys is not None:
+            for player in humans:
+                player.steer(keys, game.bullets)
+    
+    # Update game
+    game.update()
+
+def run_threaded(game, args, autopilot, soak, frame_stats, pacer, latency=None, recorder=None):
+    # Simulation ticks on its own thread, this thread handles input and drawing
+    sim = SimulationThread(lambda keys: step(game, keys, autopilot), game.snapshot, FPS,
+                           idle=lambda: is_idle(game, autopilot))
+    sim.start()
+    snapshot, seq, _ = sim.buffer.latest()
     running = True
     
     while running:
-        # Process events
-        for event in pygame.event.get():
+        events = pacer.events(is_idle(snapshot, autopilot))
+        if latency:
+            # The tick already running uses the old inputs, the one after it the new ones
+            latency.pumped(events, seq + 2, pacer.idle)
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            elif not display.handle_event(event):
+                sim.call(handle_event, game, event, autopilot)
+        sim.set_inputs(pygame.key.get_pressed())
+        
+        # Draw the newest snapshot, sleeping until the simulation publishes one
+        snapshot, new_seq, _ = sim.buffer.wait_newer(seq, 1 / FPS)
+        if soak:
+            soak.tick()
+            if soak.done:
+                running = False
+        fresh = new_seq != seq
+        seq = new_seq
+        if args.headless or not (fresh or pacer.idle) or not pacer.should_draw(view(snapshot)):
+            continue
+        
+        start = time.perf_counter()
+        snapshot.draw(display.canvas)
+        if recorder:
+            recorder.capture(display.surface)
+        display.present()
+        frame_stats.add(time.perf_counter() - start)
+        if latency:
+            latency.flipped(seq)
+        pacer.tick()
+    
+    sim.stop()
+    return sim.stats
+
+# Main game loop
+def main():
+    args = parse_args()
+    display.smooth = args.smooth
+    if args.render_scale != 1.0:
+        display.set_render_scale(args.render_scale)
+    if args.window_scale != 1.0:
+        display.set_scale(args.window_scale)
+    if args.fullscreen:
+        display.toggle_fullscreen()
+    game = Game(args.players)
+    autopilot = None
+    if args.autopilot or args.soak:
+        game.record_scores = False
+        player = game.player
+        autopilot = Autopilot(
+            ShipModel(WIDTH, HEIGHT, player.size / 2, player.rotation_speed,
+                      player.acceleration, player.friction, player.max_velocity),
+            budget_us=args.bot_budget_us or 2000)
+    soak = None
+    if args.soak:
+        soak = SoakMonitor(args.soak, args.soak_interval, args.soak_max_growth_mb)
+        soak.start()
+        if args.bot_budget_us is None:
+            # tracemalloc now runs and slows planning down, measure a full plan again
+            print(f"autopilot: budget calibrated to {autopilot.calibrate()} us under tracemalloc")
+    tick_stats = TimingStats("tick")
+    frame_stats = TimingStats("frame")
+    pacer = FramePacer(clock, FPS, busy_loop=args.busy_loop)
+    latency = LatencyProbe() if args.latency and not args.headless else None
+    recorder = None
+    if args.record:
+        recorder = FrameRecorder(args.record, (WIDTH, HEIGHT), args.record_format, args.record_every)
+    
+    if args.threaded:
+        tick_stats = run_threaded(game, args, autopilot, soak, frame_stats, pacer, latency, recorder)
+    else:
+        running = True
+        while running:
+            # Process events, static screens block here until something happens
+            events = pacer.events(is_idle(game, autopilot))
+            if latency:
+                latency.pumped(events, waited=pacer.idle)
+            for event in events:
+                if event.type == pygame.QUIT:
+                    running = False
+                elif not display.handle_event(event):
+                    handle_event(game, event, autopilot)
             
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    if game.state == "menu" or game.state == "game_over":
-                        game.state = "playing"
-                        game.reset()
-                elif event.key == pygame.K_ESCAPE:
-                    if game.state == "playing":
-                        game.state = "menu"
-        
-        # Process input
-        if game.state == "playing":
-            keys = pygame.key.get_pressed()
+            # Sample the keyboard once, after the pump and right before the update
+            if not is_idle(game, autopilot):
+                start = time.perf_counter()
+                step(game, pygame.key.get_pressed(), autopilot)
+                tick_stats.add(time.perf_counter() - start)
             
-            # Rotation
-            if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-                game.player.rotate(1)
-            if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-                game.player.rotate(-1)
+            if soak:
+                soak.tick()
+                if soak.done:
+                    running = False
             
-            # Thrust
-            if keys[pygame.K_UP] or keys[pygame.K_w]:
-                game.player.thrust()
+            if args.headless:
+                continue
             
-            # Shoot
-            if keys[pygame.K_SPACE]:
-                game.player.shoot(game.bullets)
-        
-        # Update game
-        game.update()
-        
-        # Draw everything
-        game.draw(screen)
-        pygame.display.flip()
-        
-        # Cap the frame rate
-        clock.tick(FPS)
+            # Draw everything, idle screens only when something changed
+            if pacer.should_draw(view(game)):
+                start = time.perf_counter()
+                game.draw(display.canvas)
+                if recorder:
+                    recorder.capture(display.surface)
+                display.present()
+                frame_stats.add(time.perf_counter() - start)
+                if latency:
+                    latency.flipped()
+            
+            # Cap the frame rate, lower while the window is in the background
+            pacer.tick()
     
+    if args.stats or args.threaded:
+        print(tick_stats.report())
+        print(frame_stats.report())
+        print(sprite_cache.report())
+        print(audio.report())
+    if autopilot:
+        print(autopilot.report())
+    if latency:
+        print(latency.report())
+    if recorder:
+        recorder.close()  # Writes out the frames still queued
+        print(recorder.report())
+    passed = soak.finish() if soak else True
+    game.leaderboard.close()
     pygame.quit()
-    sys.exit()
+    sys.exit(0 if passed else 1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
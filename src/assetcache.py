@@ -0,0 +1,129 @@
+"""On-disk cache for pre-rendered sprite sheets.
+
+Every sheet a game pre-renders at startup (ship rotations, orb glow frames,
+asteroid shapes, HUD glyphs) is packed into one RGBA atlas file under
+~/.astersnake. The file starts with a small JSON index holding a key, and
+the raw pixels follow. The key hashes the source files that draw the
+sprites, so editing drawing code or constants in a game script invalidates
+the cache. A warm start memory-maps the file and turns the pixel block into
+a single surface in one bulk copy instead of drawing anything.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+import pygame
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".astersnake", "sprites")
+MAGIC = b"ASPR"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sI")
+# Packed sheets are laid out in rows at least this wide
+PACK_WIDTH = 2048
+# Shared drawing code every cached sheet depends on
+SHARED_SOURCES = [__file__, os.path.join(os.path.dirname(os.path.abspath(__file__)), "sprites.py")]
+
+
+def pack(sizes, min_width=PACK_WIDTH):
+    # Shelf packing: tallest first, left to right in rows. Returns ({name: rect}, size)
+    width = max([min_width] + [w for w, _ in sizes.values()])
+    rects = {}
+    x = y = row_height = 0
+    for name in sorted(sizes, key=lambda name: (-sizes[name][1], name)):
+        w, h = sizes[name]
+        if x + w > width:
+            x, y, row_height = 0, y + row_height, 0
+        rects[name] = (x, y, w, h)
+        x += w
+        row_height = max(row_height, h)
+    return rects, (width, max(1, y + row_height))
+
+
+class AssetCache:
+    def __init__(self, name, sources, extra=(), directory=DEFAULT_DIR):
+        # sources: files whose contents decide what gets drawn (the game script),
+        # extra: anything else that changes the pixels, such as the font in use
+        self.path = os.path.join(directory, name + ".atlas")
+        self.key = self._key([*sources, *SHARED_SOURCES], extra)
+        self.loaded = False
+        self.seconds = 0.0
+
+    def _key(self, sources, extra):
+        digest = hashlib.sha256()
+        digest.update(f"{FORMAT_VERSION} {pygame.version.ver}".encode())
+        for path in sources:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        digest.update(repr(tuple(extra)).encode())
+        return digest.hexdigest()
+
+    def load(self, builders):
+        # builders: {name: function returning a Surface}. Returns {name: Surface},
+        # read from the cache file when it is current, otherwise built and saved.
+        start = time.perf_counter()
+        sheets = self._read(builders)
+        self.loaded = sheets is not None
+        if sheets is None:
+            sheets = self._build(builders)
+        self.seconds = time.perf_counter() - start
+        return sheets
+
+    def _read(self, builders):
+        try:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, index_size = HEADER.unpack_from(data)
+                if magic != MAGIC:
+                    return None
+                index = json.loads(data[HEADER.size:HEADER.size + index_size])
+                if index["key"] != self.key or set(index["rects"]) != set(builders):
+                    return None
+                size = tuple(index["size"])
+                offset = HEADER.size + index_size
+                with memoryview(data)[offset:offset + size[0] * size[1] * 4] as pixels:
+                    sheets = self._unpack(pixels, size, index["rects"])
+        except (OSError, ValueError, KeyError, BufferError, struct.error, pygame.error):
+            return None
+        return sheets
+
+    def _unpack(self, pixels, size, rects):
+        # One copy out of the buffer, then every sheet is a view into that surface
+        packed = pygame.image.frombuffer(pixels, size, "RGBA")
+        packed = packed.convert_alpha() if pygame.display.get_surface() is not None else packed.copy()
+        return {name: packed.subsurface(rect) for name, rect in rects.items()}
+
+    def _build(self, builders):
+        surfaces = {name: build() for name, build in builders.items()}
+        rects, size = pack({name: surface.get_size() for name, surface in surfaces.items()})
+        pixels = bytearray(size[0] * size[1] * 4)
+        stride = size[0] * 4
+        for name, surface in surfaces.items():
+            # Rows are copied byte for byte, blitting would blend the alpha sheets
+            x, y, w, h = rects[name]
+            data = pygame.image.tobytes(surface, "RGBA")
+            for row in range(h):
+                start = (y + row) * stride + x * 4
+                pixels[start:start + w * 4] = data[row * w * 4:(row + 1) * w * 4]
+        self._write(pixels, size, rects)
+        return self._unpack(pixels, size, rects)
+
+    def _write(self, pixels, size, rects):
+        index = json.dumps({"key": self.key, "size": size, "rects": rects}).encode()
+        partial = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(partial, "wb") as f:
+                f.write(HEADER.pack(MAGIC, len(index)))
+                f.write(index)
+                f.write(pixels)
+            # Readers never see a half written file
+            os.replace(partial, self.path)
+        except OSError as e:
+            print(f"Sprite cache not saved: {e}", file=sys.stderr)
+
+    def report(self):
+        how = "loaded from" if self.loaded else "built and saved to"
+        return f"sprites: {how} {self.path} in {self.seconds * 1000:.1f} ms"
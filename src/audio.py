@@ -0,0 +1,203 @@
+"""Sound effects that are ready to play the moment something happens.
+
+Every effect is synthesized once at startup and converted to a mixer Sound
+in the mixer's own sample format, so playing one is a single channel call:
+nothing is loaded, decoded or resampled during a frame. The mixer is set up
+before pygame.init with a small buffer, which keeps the delay between an
+event and hearing it short. Channels are split between categories (shots,
+explosions, ...) with a fixed number of voices each, so a burst of shots can
+never drown out a hit; when a category is full its oldest voice is cut off
+for the new sound.
+"""
+import array
+import math
+import random
+import time
+
+import pygame
+
+SAMPLE_RATE = 22050
+# Samples per mixer callback, about 12 ms at 22050 Hz
+BUFFER = 256
+# Looping sounds fade out instead of stopping with a click
+LOOP_FADE_MS = 150
+
+
+def pre_init():
+    # Must run before pygame.init, which opens the mixer with these settings
+    pygame.mixer.pre_init(SAMPLE_RATE, -16, 1, BUFFER)
+
+
+# Synthesis helpers. Each returns a list of samples between -1 and 1 at `rate` Hz.
+
+def sweep(rate, seconds, start, end, wave="square", volume=0.5):
+    # Tone gliding from `start` to `end` Hz that fades out over its length
+    count = int(rate * seconds)
+    step = start / rate  # Cycles per sample, multiplied by `glide` every sample
+    glide = (end / start) ** (1 / count)
+    phase = 0.0
+    samples = []
+    for gain in envelope(count, rate, volume):
+        phase += step
+        step *= glide
+        if wave == "square":
+            samples.append(gain if phase % 1.0 < 0.5 else -gain)
+        else:
+            samples.append(gain * math.sin(2 * math.pi * phase))
+    return samples
+
+
+def noise(rate, seconds, volume=0.5, smoothing=0.2, seed=0):
+    # Low-passed noise burst, a lower `smoothing` gives a deeper rumble
+    rng = random.Random(seed).random
+    value = 0.0
+    samples = []
+    for gain in envelope(int(rate * seconds), rate, volume):
+        value += (2 * rng() - 1 - value) * smoothing
+        samples.append(value * gain)
+    return samples
+
+
+def drone(rate, seconds, frequencies, volume=0.2):
+    # Steady sines for looping; loops without a seam when every frequency
+    # completes a whole number of cycles in `seconds`
+    count = int(rate * seconds)
+    scale = volume / len(frequencies)
+    return [scale * sum(math.sin(2 * math.pi * frequency * i / rate) for frequency in frequencies)
+            for i in range(count)]
+
+
+def envelope(count, rate, volume):
+    # Gain per sample: 2 ms attack against clicks, then a quadratic fade to silence
+    attack = max(1, int(rate * 0.002))
+    gains = [volume * (1 - i / count) ** 2 for i in range(count)]
+    for i in range(min(attack, count)):
+        gains[i] *= i / attack
+    return gains
+
+
+def mix(*parts):
+    length = max(len(part) for part in parts)
+    return list(map(sum, zip(*(part + [0.0] * (length - len(part)) for part in parts))))
+
+
+def sequence(*parts):
+    return [value for part in parts for value in part]
+
+
+# Sound effects of both games by name: (voice category, synthesis at a sample
+# rate). Audio turns them into mixer sounds once at startup.
+EFFECTS = {
+    "shot": ("shots", lambda rate: sweep(rate, 0.12, 1400, 350, volume=0.15)),
+    "enemy shot": ("shots", lambda rate: sweep(rate, 0.18, 500, 180, volume=0.15)),
+    "asteroid large": ("explosions", lambda rate: noise(rate, 0.6, 0.9, smoothing=0.06, seed=1)),
+    "asteroid medium": ("explosions", lambda rate: noise(rate, 0.35, 0.7, smoothing=0.15, seed=2)),
+    "asteroid small": ("explosions", lambda rate: noise(rate, 0.2, 0.5, smoothing=0.4, seed=3)),
+    "saucer down": ("explosions", lambda rate: mix(noise(rate, 0.5, 0.6, smoothing=0.1, seed=4),
+                                                   sweep(rate, 0.5, 900, 120, volume=0.15))),
+    "orb": ("pickups", lambda rate: sequence(*(sweep(rate, 0.07, pitch, pitch, "sine", 0.3)
+                                               for pitch in (660, 880, 1320)))),
+    "saucer hum": ("saucers", lambda rate: drone(rate, 0.2, (110, 115, 220), 0.2)),
+    "player hit": ("hits", lambda rate: mix(noise(rate, 0.8, 0.8, smoothing=0.08, seed=5),
+                                            sweep(rate, 0.8, 420, 50, volume=0.2))),
+}
+# Most sounds of each category playing at once, a new one cuts off the oldest
+VOICES = {"shots": 4, "explosions": 4, "pickups": 2, "saucers": 1, "hits": 2}
+
+
+class Audio:
+    def __init__(self, sounds, voices, enabled=True):
+        # sounds: {name: (category, build(rate) returning samples)},
+        # voices: {category: most sounds of that category playing at once}
+        self.sounds = {}
+        self.stolen = 0
+        self.seconds = 0.0
+        self.enabled = enabled and pygame.mixer.get_init() is not None
+        if not enabled and pygame.mixer.get_init():
+            pygame.mixer.quit()  # Not even an idle mixer thread
+        if self.enabled and pygame.mixer.get_init()[1] != -16:
+            print("Audio disabled: the mixer did not accept 16 bit samples")
+            self.enabled = False
+        if not self.enabled:
+            return
+
+        start = time.perf_counter()
+        rate, _, channels = pygame.mixer.get_init()
+        for name, (category, build) in sounds.items():
+            self.sounds[name] = category, self._convert(build(rate), channels)
+        # Every channel belongs to one category; reserving them all keeps
+        # pygame from handing them out to anything else
+        total = sum(voices.values())
+        pygame.mixer.set_num_channels(total)
+        pygame.mixer.set_reserved(total)
+        self._channels = [pygame.mixer.Channel(i) for i in range(total)]
+        self._started = [0] * total
+        self._plays = 0
+        self._voices = {}
+        first = 0
+        for category, count in voices.items():
+            self._voices[category] = range(first, first + count)
+            first += count
+        self._loops = {}
+        self.seconds = time.perf_counter() - start
+
+    def _convert(self, samples, channels):
+        # Mixer format: signed 16 bit, the same sample repeated for each channel.
+        # Anything louder than full scale is turned down as a whole, not clipped.
+        scale = 32767 / max(1.0, max(map(abs, samples)))
+        mono = array.array("h", [int(value * scale) for value in samples])
+        data = array.array("h", bytes(len(mono) * channels * 2))
+        for channel in range(channels):
+            data[channel::channels] = mono
+        return pygame.mixer.Sound(buffer=data)
+
+    def _voice(self, category):
+        # A free channel of the category, or the one that started playing first
+        voices = self._voices[category]
+        for i in voices:
+            if not self._channels[i].get_busy():
+                break
+        else:
+            i = min(voices, key=self._started.__getitem__)
+            self.stolen += 1
+        self._plays += 1
+        self._started[i] = self._plays
+        return self._channels[i]
+
+    def play(self, name):
+        if self.enabled:
+            category, sound = self.sounds[name]
+            self._voice(category).play(sound)
+
+    def loop(self, name, on):
+        # Keeps a looping sound playing while `on`, cheap to call every frame
+        if not self.enabled or (name in self._loops) == on:
+            return
+        if on:
+            category, sound = self.sounds[name]
+            channel = self._voice(category)
+            channel.play(sound, loops=-1)
+            self._loops[name] = channel
+        else:
+            self._loops.pop(name).fadeout(LOOP_FADE_MS)
+
+    def pause(self):
+        if self.enabled:
+            pygame.mixer.pause()
+
+    def resume(self):
+        if self.enabled:
+            pygame.mixer.unpause()
+
+    def stop(self):
+        if self.enabled:
+            pygame.mixer.stop()
+            pygame.mixer.unpause()
+            self._loops.clear()
+
+    def report(self):
+        if not self.enabled:
+            return "audio: off"
+        rate = pygame.mixer.get_init()[0]
+        return (f"audio: {len(self.sounds)} sounds ready in {self.seconds * 1000:.1f} ms, "
+                f"{rate} Hz, {BUFFER} sample buffer, {self.stolen} voices stolen")
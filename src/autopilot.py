@@ -0,0 +1,239 @@
+"""Bot player used to soak-test the games without a human at the keyboard.
+
+The bot rebuilds a coarse occupancy grid of everything that can kill the ship
+(asteroids, saucers, enemy bullets and the tail), then simulates a handful of
+input choices a short time ahead and keeps the cheapest one. Planning stops
+as soon as the per-frame budget is spent and the best choice so far is used.
+Under tracemalloc every step costs several times more, so soak runs size the
+budget with calibrate() instead of guessing it.
+"""
+import math
+import random
+import time
+from typing import NamedTuple
+
+from grid import OccupancyGrid
+
+
+class Action(NamedTuple):
+    turn: int  # 1 = rotate left (angle increases), -1 = rotate right
+    thrust: bool
+    shoot: bool
+
+
+class ShipModel(NamedTuple):
+    # Physics of the controlled ship, so the planner can predict its path
+    width: int
+    height: int
+    radius: float
+    rotation_speed: float
+    acceleration: float
+    friction: float
+    max_speed: float = 0  # 0 means uncapped
+
+
+IDLE = Action(0, False, False)
+# (turn, thrust, frames to keep turning before flying straight)
+CANDIDATES = [(turn, thrust, turn_frames)
+              for thrust in (True, False)
+              for turn, turn_frames in ((0, 0), (1, 8), (-1, 8), (1, 24), (-1, 24))]
+
+LOOKAHEAD = 45  # frames simulated per candidate
+HEADROOM = 8  # 1/HEADROOM of the budget is kept free of planning work
+HAZARD = 1
+TAIL = 2
+
+
+class Autopilot:
+    def __init__(self, model, budget_us=2000, cell_size=10):
+        self.model = model
+        self.budget_ns = int(budget_us * 1000)
+        self.grid = OccupancyGrid(model.width, model.height, cell_size)
+        self.previous = IDLE
+        self.plans = 0
+        self.overruns = 0  # Plans cut short by the budget
+        self.late = 0  # Plans that still took longer than the budget
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def plan(self, pos, vel, angle, orbs, hazards, bullets, tail):
+        # pos/vel: ship state, angle in degrees (0 = right, counter-clockwise)
+        # orbs: [(x, y)], hazards: [(x, y, vx, vy, radius)], bullets: [(x, y, vx, vy)]
+        # tail: [(x, y)] lethal tail points (recent segments already excluded)
+        start = time.perf_counter_ns()
+        # Work stops an eighth early, leaving room for the step that was in
+        # flight at the check and for picking the action
+        deadline = start + self.budget_ns - self.budget_ns // HEADROOM
+        if not self._build_grid(hazards, bullets, tail, deadline):
+            # No time left to look ahead on a half-built grid, keep doing what worked
+            return self._finish(start, self.previous, False)
+
+        complete = True
+        best = None
+        best_cost = math.inf
+        for turn, thrust, turn_frames in CANDIDATES:
+            cost = self._evaluate(pos, vel, angle, turn, thrust, turn_frames, orbs, deadline)
+            if cost is None:
+                complete = False
+                break
+            if (turn, thrust) == (self.previous.turn, self.previous.thrust):
+                cost -= 5  # Hysteresis, avoids jittering between equal choices
+            if cost < best_cost:
+                best_cost = cost
+                best = (turn, thrust)
+
+        if best is None:
+            return self._finish(start, self.previous, complete)
+        action = Action(best[0], best[1], self._should_shoot(pos, angle, hazards))
+        self.previous = action
+        return self._finish(start, action, complete)
+
+    def calibrate(self, runs=20, margin=1.5):
+        # Sets the budget to fit a full plan, measured on a crowded synthetic
+        # field under the current conditions. Returns the new budget in us.
+        m = self.model
+        rng = random.Random(0)
+        pos = (m.width / 2, m.height / 2)
+
+        def anywhere():
+            return rng.uniform(0, m.width), rng.uniform(0, m.height)
+
+        hazards = [(*anywhere(), rng.uniform(-2, 2), rng.uniform(-2, 2), rng.choice((10, 20, 40)))
+                   for _ in range(12)]
+        bullets = [(*anywhere(), rng.uniform(-5, 5), rng.uniform(-5, 5)) for _ in range(4)]
+        orbs = [anywhere() for _ in range(5)]
+        tail = [(pos[0] + math.cos(i / 40) * (60 + i / 4), pos[1] + math.sin(i / 40) * (60 + i / 4))
+                for i in range(300)]
+        self.budget_ns = 10 ** 12  # No deadline while measuring
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter_ns()
+            self.plan(pos, (1.0, 0.5), 0, orbs, hazards, bullets, tail)
+            times.append(time.perf_counter_ns() - start)
+        # The median ignores runs that a collection or the scheduler slowed down.
+        # The deadline falls 1/HEADROOM before the budget, the margin is on top of that.
+        typical = sorted(times)[runs // 2]
+        self.budget_ns = int(typical * margin * HEADROOM / (HEADROOM - 1))
+        self.previous = IDLE
+        self.plans = self.overruns = self.late = self.total_ns = self.max_ns = 0
+        return round(self.budget_ns / 1000)
+
+    def _finish(self, start, action, complete):
+        elapsed = time.perf_counter_ns() - start
+        self.plans += 1
+        self.total_ns += elapsed
+        self.max_ns = max(self.max_ns, elapsed)
+        if not complete:
+            self.overruns += 1
+        if elapsed > self.budget_ns:
+            self.late += 1
+        return action
+
+    def _build_grid(self, hazards, bullets, tail, deadline):
+        grid = self.grid
+        grid.clear()
+        margin = self.model.radius + 4
+
+        # Hazards are marked where they are now and where they will be shortly
+        for x, y, vx, vy, radius in hazards:
+            grid.mark_circle(x, y, radius + margin, HAZARD)
+            grid.mark_circle(x + vx * 12, y + vy * 12, radius + margin, HAZARD)
+            if time.perf_counter_ns() > deadline:
+                return False
+
+        for x, y, vx, vy in bullets:
+            for step in range(0, 30, 5):
+                grid.mark_circle(x + vx * step, y + vy * step, margin, HAZARD)
+            if time.perf_counter_ns() > deadline:
+                return False
+
+        # Dense tail points mostly land in cells that are already marked, skip those
+        skip_sq = (grid.cell_size / 2) ** 2
+        last_x = last_y = -1e9
+        for i, (x, y) in enumerate(tail):
+            if (x - last_x) ** 2 + (y - last_y) ** 2 < skip_sq:
+                continue
+            grid.mark_circle(x, y, margin, TAIL)
+            last_x, last_y = x, y
+            if i % 16 == 15 and time.perf_counter_ns() > deadline:
+                return False
+        return True
+
+    def _evaluate(self, pos, vel, angle, turn, thrust, turn_frames, orbs, deadline):
+        # Cost of one candidate, or None when the deadline passed before it was done
+        m = self.model
+        width, height = m.width, m.height
+        grid = self.grid
+        cells, cols, rows, size = grid.cells, grid.cols, grid.rows, grid.cell_size
+        accel, friction, max_speed = m.acceleration, m.friction, m.max_speed
+        x, y = pos
+        vx, vy = vel
+        rad = math.radians(angle)
+        step_rad = math.radians(turn * m.rotation_speed)
+        cos_a, sin_a = math.cos(rad), math.sin(rad)
+        cost = 0.0
+        nearest = self._nearest_orb_distance(x, y, orbs)
+        closest = nearest
+
+        for step in range(1, LOOKAHEAD + 1):
+            if step <= turn_frames:
+                rad += step_rad
+                cos_a, sin_a = math.cos(rad), math.sin(rad)
+            if thrust:
+                vx += cos_a * accel
+                vy -= sin_a * accel
+                if max_speed:
+                    speed = math.hypot(vx, vy)
+                    if speed > max_speed:
+                        vx *= max_speed / speed
+                        vy *= max_speed / speed
+            x = (x + vx) % width
+            y = (y + vy) % height
+            vx *= friction
+            vy *= friction
+
+            cell = cells[int(y // size) % rows * cols + int(x // size) % cols]
+            if cell:
+                # Early collisions are far worse than ones we can still steer away from
+                cost += (LOOKAHEAD + 1 - step) * (400 if cell == TAIL else 300)
+            if step % 4 == 0:
+                closest = min(closest, self._nearest_orb_distance(x, y, orbs))
+                if step % 8 == 0 and time.perf_counter_ns() > deadline:
+                    return None
+
+        # Head for the nearest orb, without building up reckless speed
+        cost += closest + (nearest - closest) * 0.5
+        cost += max(0.0, math.hypot(vx, vy) - 2.5) * 40
+        return cost
+
+    def _nearest_orb_distance(self, x, y, orbs):
+        if not orbs:
+            return 0.0
+        width, height = self.model.width, self.model.height
+        best = math.inf
+        for ox, oy in orbs:
+            dx = (ox - x + width / 2) % width - width / 2
+            dy = (oy - y + height / 2) % height - height / 2
+            best = min(best, dx * dx + dy * dy)
+        return math.sqrt(best)
+
+    def _should_shoot(self, pos, angle, hazards):
+        # Fire when something destructible sits roughly in front of the nose
+        m = self.model
+        rad = math.radians(angle)
+        hx, hy = math.cos(rad), -math.sin(rad)
+        for x, y, _, _, radius in hazards:
+            dx = (x - pos[0] + m.width / 2) % m.width - m.width / 2
+            dy = (y - pos[1] + m.height / 2) % m.height - m.height / 2
+            along = dx * hx + dy * hy
+            if 0 < along < 350 and abs(dx * hy - dy * hx) < radius + 4:
+                return True
+        return False
+
+    def report(self):
+        if not self.plans:
+            return "autopilot: no frames planned"
+        mean_us = self.total_ns / self.plans / 1000
+        return (f"autopilot: {self.plans} plans, mean {mean_us:.0f} us, "
+                f"max {self.max_ns / 1000:.0f} us, budget {self.budget_ns / 1000:.0f} us, "
+                f"{self.overruns} cut short, {self.late} over budget")
@@ -0,0 +1,136 @@
+"""Recording of drawn frames to image sequences off the frame loop.
+
+The only work left on the main thread is one blit per captured frame: the
+game surface is copied into a free buffer from a small pool and queued.
+Background workers turn the buffers into files, either PNG or raw RGB, and
+put them back into the pool. The PNG encoder is written with zlib because
+pygame.image.save holds the GIL while it compresses, which would stall the
+frame loop from the worker threads; zlib releases it. The queue is bounded:
+when it is full the frame is dropped before anything is copied, and the
+frame numbers in the file names show the gap.
+"""
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import pygame
+
+from simloop import TimingStats
+
+FORMATS = ("png", "raw")
+# Fast compression, a session of PNGs is still several times smaller than raw frames
+PNG_LEVEL = 1
+
+
+def encode_png(data, width, height, pitch):
+    # 8 bit RGB PNG from rows of `pitch` bytes of RGB pixels
+    row = width * 3
+    lines = b"".join(b"\x00" + data[y * pitch:y * pitch + row] for y in range(height))
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    return b"".join([b"\x89PNG\r\n\x1a\n",
+                     chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+                     chunk(b"IDAT", zlib.compress(lines, PNG_LEVEL)),
+                     chunk(b"IEND", b"")])
+
+
+class FrameRecorder:
+    def __init__(self, directory, size, fmt="png", every=1, workers=2, queue_size=8):
+        # Captures every `every`th frame passed to capture(); frames are numbered
+        # by how many were passed in, so file names match the frame count
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown capture format {fmt!r}")
+        self.directory = directory
+        self.size = size
+        self.format = fmt
+        self.every = every
+        self.frames = 0
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.stats = TimingStats("capture (main thread)")
+        self._scaled = None  # Frames drawn below the recording's size are scaled up here
+        self.encode_stats = TimingStats("capture encode (workers)")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "capture.json"), "w") as f:
+            json.dump({"width": size[0], "height": size[1], "format": fmt,
+                       "pixels": "RGB24", "every": every}, f)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        # One buffer per queue slot and per worker, so there is always a free
+        # one while the queue is not full
+        self._free = queue.SimpleQueue()
+        for _ in range(queue_size + workers):
+            # Byte order R, G, B, so a buffer's memory is already what the files hold
+            self._free.put(pygame.Surface(size, 0, 24, (0xFF, 0xFF00, 0xFF0000, 0)))
+        self._threads = [threading.Thread(target=self._run, name=f"capture {i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def capture(self, surface):
+        # Call with the finished frame before it is presented. Never blocks.
+        number = self.frames
+        self.frames += 1
+        if number % self.every:
+            return
+        if self._queue.full():
+            self.dropped += 1
+            return
+        start = time.perf_counter()
+        buffer = self._free.get()
+        if surface.get_size() != self.size:
+            # Drawn at a lower render scale, the files keep the recording's size
+            if self._scaled is None or self._scaled.get_bitsize() != surface.get_bitsize():
+                self._scaled = pygame.Surface(self.size, 0, surface)
+            surface = pygame.transform.scale(surface, self.size, self._scaled)
+        buffer.blit(surface, (0, 0))
+        self._queue.put_nowait((number, buffer))
+        self.captured += 1
+        self.stats.add(time.perf_counter() - start)
+
+    def _run(self):
+        width, height = self.size
+        extension = "png" if self.format == "png" else "rgb"
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            number, buffer = item
+            start = time.perf_counter()
+            data = buffer.get_buffer().raw
+            pitch = buffer.get_pitch()
+            self._free.put(buffer)
+            if self.format == "png":
+                data = encode_png(data, width, height, pitch)
+            elif pitch != width * 3:
+                data = b"".join(data[y * pitch:y * pitch + width * 3] for y in range(height))
+            path = os.path.join(self.directory, f"frame_{number:06d}.{extension}")
+            try:
+                with open(path, "wb") as f:
+                    f.write(data)
+            except OSError as e:
+                print(f"Frame capture failed: {e}")
+                continue
+            with self._lock:
+                self.written += 1
+                self.encode_stats.add(time.perf_counter() - start)
+
+    def close(self):
+        # Waits until every queued frame is written
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def report(self):
+        every = f", every {self.every}" if self.every > 1 else ""
+        return (f"capture: {self.written} of {self.captured} captured frames written to "
+                f"{self.directory} ({self.format}{every}), {self.dropped} dropped\n"
+                f"{self.stats.report()}\n{self.encode_stats.report()}")
@@ -0,0 +1,69 @@
+"""One collision stage per frame for everything shaped like a circle.
+
+Entities are added with a layer bit. A list of rules says which pairs of
+layers collide and what kind of event that is, which gives the first layer
+of each rule a mask of the layers it can touch. detect() puts all colliders
+into one spatial hash and only entities on a first layer (ships, shots)
+look for neighbours, so each pair is tested once and entities that are only
+ever hit (asteroids, orbs) never search. Neighbours whose layers are not in
+the mask are skipped before any distance is computed. The events come back
+sorted by rule and then by the order the entities were added, so the game
+resolves them the same way every time, after all tests are done.
+"""
+from typing import Any, NamedTuple
+
+from grid import SpatialHash
+
+
+class Collision(NamedTuple):
+    kind: Any
+    first: Any  # Entity on the rule's first layer
+    second: Any  # Entity on the rule's second layer
+
+
+class CollisionStage:
+    def __init__(self, width, height, rules, cell_size=64):
+        # rules: [(first layer, second layer, kind)] in the order events are resolved
+        self.masks = {}
+        self.rules = {}
+        for order, (first, second, kind) in enumerate(rules):
+            self.masks[first] = self.masks.get(first, 0) | second
+            self.rules[first, second] = (order, kind)
+        self.grid = SpatialHash(width, height, cell_size)
+        self.colliders = []
+        self.max_radius = 0
+
+    def clear(self):
+        self.colliders.clear()
+        self.grid.clear()
+        self.max_radius = 0
+
+    def add(self, x, y, radius, layer, entity):
+        index = len(self.colliders)
+        self.colliders.append((x, y, radius, layer, entity))
+        self.grid.insert(x, y, index)
+        if radius > self.max_radius:
+            self.max_radius = radius
+
+    def detect(self):
+        # Collision events for every overlapping pair whose layers interact
+        colliders, masks, rules = self.colliders, self.masks, self.rules
+        found = []
+        for i, (x, y, radius, layer, entity) in enumerate(colliders):
+            mask = masks.get(layer, 0)
+            if not mask:
+                continue
+            for j in self.grid.query(x, y, radius + self.max_radius):
+                other_x, other_y, other_radius, other_layer, other = colliders[j]
+                if not other_layer & mask:
+                    continue
+                if other_layer == layer and j <= i:
+                    continue  # Within one layer each pair once, and nothing hits itself
+                dx = x - other_x
+                dy = y - other_y
+                reach = radius + other_radius
+                if dx * dx + dy * dy < reach * reach:
+                    order, kind = rules[layer, other_layer]
+                    found.append((order, i, j, kind, entity, other))
+        found.sort(key=lambda event: event[:3])
+        return [Collision(kind, first, second) for _, _, _, kind, first, second in found]
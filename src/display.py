@@ -0,0 +1,125 @@
+"""Window that shows the game surface at any size.
+
+The game always draws onto `surface`, which has the internal render
+resolution, through `canvas` in playfield coordinates. The render resolution
+is the playfield size times the render scale, so a weak machine can draw
+fewer pixels and let present() scale them up. present() scales the surface
+into the window (letterboxed to keep the aspect ratio), so a large, resized
+or fullscreen window costs one scale blit on top of drawing at the render
+resolution. When the window is exactly the render size the game draws
+straight into it and nothing is scaled.
+
+Keys: F6/F7 lower/raise the render scale, F9/F10 shrink/grow the window
+scale, F8 toggles smooth scaling and F11 toggles fullscreen.
+"""
+import pygame
+
+from canvas import Canvas, ScaledImages
+
+SCALE_STEPS = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0]
+RENDER_SCALE_STEPS = [0.5, 0.625, 0.75, 0.875, 1.0]
+
+
+class ScaledDisplay:
+    def __init__(self, size, caption, scale=1.0, smooth=False, render_scale=1.0):
+        self.size = size
+        self.smooth = smooth
+        self.fullscreen = False
+        self.scale = scale
+        self.render_scale = render_scale
+        pygame.display.set_caption(caption)
+        self._offscreen = pygame.Surface(self.render_size)
+        self._images = ScaledImages(render_scale)
+        self._open(self._scaled_size(scale), pygame.RESIZABLE)
+
+    @property
+    def render_size(self):
+        return self._scaled_size(self.render_scale)
+
+    def _scaled_size(self, scale):
+        return int(self.size[0] * scale), int(self.size[1] * scale)
+
+    def _open(self, window_size, flags):
+        self.window = pygame.display.set_mode(window_size, flags)
+        if self.window.get_size() == self.render_size:
+            self.surface = self.window
+            self.target = None
+            self.canvas = Canvas(self.surface, self.render_scale, self._images)
+            return
+        # Letterbox: largest rectangle with the game's aspect ratio, centered
+        width, height = self.window.get_size()
+        factor = min(width / self.size[0], height / self.size[1])
+        rect = pygame.Rect(0, 0, int(self.size[0] * factor), int(self.size[1] * factor))
+        rect.center = (width // 2, height // 2)
+        self.window.fill((0, 0, 0))
+        self.surface = self._offscreen
+        self.target = self.window.subsurface(rect)
+        self.canvas = Canvas(self.surface, self.render_scale, self._images)
+
+    def _reopen(self):
+        if self.fullscreen:
+            self._open((0, 0), pygame.FULLSCREEN)
+        else:
+            self._open(self._scaled_size(self.scale), pygame.RESIZABLE)
+
+    def set_render_scale(self, render_scale):
+        # Sprites scaled for the old render scale are dropped with its image cache
+        self.render_scale = render_scale
+        self._offscreen = pygame.Surface(self.render_size)
+        self._images = ScaledImages(render_scale)
+        self._reopen()
+
+    def step_render_scale(self, direction):
+        if direction > 0:
+            larger = [s for s in RENDER_SCALE_STEPS if s > self.render_scale]
+            self.set_render_scale(larger[0] if larger else self.render_scale)
+        else:
+            smaller = [s for s in RENDER_SCALE_STEPS if s < self.render_scale]
+            self.set_render_scale(smaller[-1] if smaller else self.render_scale)
+
+    def set_scale(self, scale):
+        self.scale = scale
+        if not self.fullscreen:
+            self._open(self._scaled_size(scale), pygame.RESIZABLE)
+
+    def step_scale(self, direction):
+        # Move to the next larger or smaller preset window scale
+        if direction > 0:
+            larger = [s for s in SCALE_STEPS if s > self.scale]
+            self.set_scale(larger[0] if larger else self.scale)
+        else:
+            smaller = [s for s in SCALE_STEPS if s < self.scale]
+            self.set_scale(smaller[-1] if smaller else self.scale)
+
+    def toggle_fullscreen(self):
+        self.fullscreen = not self.fullscreen
+        self._reopen()
+
+    def handle_event(self, event):
+        # Returns True if the event was meant for the display
+        if event.type == pygame.VIDEORESIZE and not self.fullscreen:
+            self.scale = min(event.w / self.size[0], event.h / self.size[1])
+            self._open((event.w, event.h), pygame.RESIZABLE)
+            return True
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_F8:
+                self.smooth = not self.smooth
+                return True
+            if event.key in (pygame.K_F6, pygame.K_F7):
+                self.step_render_scale(1 if event.key == pygame.K_F7 else -1)
+                return True
+            if event.key in (pygame.K_F9, pygame.K_F10):
+                self.step_scale(1 if event.key == pygame.K_F10 else -1)
+                return True
+            if event.key == pygame.K_F11:
+                self.toggle_fullscreen()
+                return True
+        return False
+
+    def present(self):
+        if self.target is not None:
+            if self.smooth:
+                pygame.transform.smoothscale(self.surface, self.target.get_size(), self.target)
+            else:
+                pygame.transform.scale(self.surface, self.target.get_size(), self.target)
+        pygame.display.flip()
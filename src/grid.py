@@ -0,0 +1,81 @@
+"""Coarse grids over the wrapping playfield."""
+import math
+
+
+class OccupancyGrid:
+    # One byte per cell, cells wrap around the screen edges like the game objects do
+    def __init__(self, width, height, cell_size):
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.cols = math.ceil(width / cell_size)
+        self.rows = math.ceil(height / cell_size)
+        self.cells = bytearray(self.cols * self.rows)
+
+    def clear(self):
+        self.cells[:] = bytes(len(self.cells))
+
+    def index(self, x, y):
+        col = int(x // self.cell_size) % self.cols
+        row = int(y // self.cell_size) % self.rows
+        return row * self.cols + col
+
+    def occupied(self, x, y):
+        return self.cells[self.index(x, y)]
+
+    def mark_circle(self, x, y, radius, value=1):
+        # Marks every cell touched by the circle's bounding box
+        size = self.cell_size
+        col0 = int((x - radius) // size)
+        col1 = int((x + radius) // size)
+        row0 = int((y - radius) // size)
+        row1 = int((y + radius) // size)
+        cols, rows, cells = self.cols, self.rows, self.cells
+        for row in range(row0, row1 + 1):
+            base = (row % rows) * cols
+            for col in range(col0, col1 + 1):
+                i = base + col % cols
+                if cells[i] < value:
+                    cells[i] = value
+
+    def free_cells(self):
+        return [i for i, value in enumerate(self.cells) if not value]
+
+    def cell_origin(self, index):
+        row, col = divmod(index, self.cols)
+        return col * self.cell_size, row * self.cell_size
+
+
+class SpatialHash:
+    # Buckets of items by cell, for neighbour lookups on the wrapping playfield
+    def __init__(self, width, height, cell_size):
+        self.cell_size = cell_size
+        self.cols = math.ceil(width / cell_size)
+        self.rows = math.ceil(height / cell_size)
+        self.buckets = {}
+
+    def clear(self):
+        self.buckets.clear()
+
+    def insert(self, x, y, item):
+        key = int(y // self.cell_size) % self.rows * self.cols + int(x // self.cell_size) % self.cols
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.buckets[key] = [item]
+        else:
+            bucket.append(item)
+
+    def query(self, x, y, radius):
+        # Items in every cell touched by the circle's bounding box (may contain extras)
+        size = self.cell_size
+        cols, rows, buckets = self.cols, self.rows, self.buckets
+        col0 = int((x - radius) // size)
+        col1 = min(int((x + radius) // size), col0 + cols - 1)
+        row0 = int((y - radius) // size)
+        row1 = min(int((y + radius) // size), row0 + rows - 1)
+        for row in range(row0, row1 + 1):
+            base = (row % rows) * cols
+            for col in range(col0, col1 + 1):
+                bucket = buckets.get(base + col % cols)
+                if bucket:
+                    yield from bucket
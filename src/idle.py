@@ -0,0 +1,82 @@
+"""Frame pacing that lets static screens and background windows go idle.
+
+The menu, game over and pause screens do not change on their own. Instead of
+clearing, re-rendering their text and flipping at the full frame rate, the
+loop blocks in pygame.event.wait() and redraws only when an event arrives or
+what the screen shows has changed. A window without focus keeps running at a
+low tick rate. Leaving an idle stretch restarts the clock, so the first
+active frame is not measured as one long frame. With busy_loop the active
+frame rate is held with Clock.tick_busy_loop, which spins instead of sleeping
+for more precise frame times at the cost of a busy core.
+"""
+import pygame
+
+# Events that can leave the window showing stale or damaged contents
+REDRAW_EVENTS = (pygame.WINDOWEXPOSED, pygame.WINDOWSIZECHANGED, pygame.WINDOWRESTORED,
+                 pygame.VIDEOEXPOSE)
+
+
+class FramePacer:
+    def __init__(self, clock, fps, background_fps=10, idle_timeout=0.5, busy_loop=False):
+        self.clock = clock
+        self.fps = fps
+        self.busy_loop = busy_loop
+        self.background_fps = background_fps
+        # Idle screens still wake up this often to pick up background changes
+        self.idle_timeout = idle_timeout
+        self.focused = True
+        self.idle = False
+        self.idle_wakeups = 0
+        self._view = None
+        self._dirty = True
+
+    @property
+    def rate(self):
+        return self.fps if self.focused else self.background_fps
+
+    def handle_event(self, event):
+        if event.type == pygame.WINDOWFOCUSLOST:
+            self.focused = False
+        elif event.type == pygame.WINDOWFOCUSGAINED:
+            self.focused = True
+        if event.type in REDRAW_EVENTS:
+            self._dirty = True
+
+    def events(self, idle):
+        # This frame's events; while idle, blocks until one arrives or the timeout passes
+        if idle:
+            timeout = self.idle_timeout if self.focused else self.idle_timeout * 4
+            event = pygame.event.wait(int(timeout * 1000))
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events.extend(pygame.event.get())
+            self.idle_wakeups += 1
+        else:
+            events = pygame.event.get()
+            if self.idle:
+                # Restart frame timing instead of counting the idle stretch as one frame
+                self.clock.tick()
+        self.idle = idle
+        if events:
+            self._dirty = True
+        for event in events:
+            self.handle_event(event)
+        return events
+
+    def should_draw(self, view=None):
+        # Active frames always draw; idle screens only after an event or when `view` changed
+        if not self.idle:
+            self._view = None
+            return True
+        if self._dirty or view != self._view:
+            self._view = view
+            self._dirty = False
+            return True
+        return False
+
+    def tick(self):
+        # Caps active frames, idle frames were already paced by the wait
+        if self.idle:
+            return 0
+        if self.busy_loop and self.focused:
+            return self.clock.tick_busy_loop(self.fps)
+        return self.clock.tick(self.rate)
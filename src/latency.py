@@ -0,0 +1,51 @@
+"""Input-to-display latency probe.
+
+The game cannot see when a key was physically pressed, only when the loop
+pumped it off the event queue. The flip that first shows a frame built with
+that input stops the clock. Each press therefore gets two numbers. The
+"seen" number runs from the pump that delivered the press to the flip; it is
+a lower bound. The "worst case" number runs from the pump before that one;
+the press happened somewhere in between, so it is an upper bound.
+"""
+import time
+
+import pygame
+
+from simloop import TimingStats
+
+
+class LatencyProbe:
+    def __init__(self):
+        self.seen = TimingStats("input latency (seen)")
+        self.worst = TimingStats("input latency (worst case)")
+        self._pending = []
+        self._last_pump = None
+
+    def pumped(self, events, shown_by=0, waited=False):
+        # Call with each batch of pumped events. shown_by is the first frame
+        # (or snapshot sequence number) built with their input. waited means the
+        # loop was blocked on the queue, so the events were seen as they arrived.
+        now = time.perf_counter()
+        previous = self._last_pump if self._last_pump is not None and not waited else now
+        self._last_pump = now
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                self._pending.append((shown_by, previous, now))
+
+    def flipped(self, frame=0):
+        # Call right after the flip, with the number of the frame that was shown
+        if not self._pending:
+            return
+        now = time.perf_counter()
+        waiting = []
+        for entry in self._pending:
+            shown_by, previous, seen = entry
+            if shown_by <= frame:
+                self.seen.add(now - seen)
+                self.worst.add(now - previous)
+            else:
+                waiting.append(entry)
+        self._pending = waiting
+
+    def report(self):
+        return f"{self.seen.report()}\n{self.worst.report()}"
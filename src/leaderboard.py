@@ -0,0 +1,108 @@
+"""Local SQLite leaderboard shared by both Astersnake variants.
+
+All database work happens on a background thread so that finishing a run
+never stalls the frame loop. The top scores are cached in memory; the game
+over screen reads the cache and never touches the database.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".astersnake", "leaderboard.db")
+TOP_N = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    variant TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    tail_length INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_top ON scores (variant, score DESC, created_at);
+"""
+
+
+class Entry(NamedTuple):
+    score: int
+    level: int
+    tail_length: int
+    duration: float
+    created_at: float
+
+
+class Leaderboard:
+    def __init__(self, variant, path=DEFAULT_PATH, top_n=TOP_N):
+        self.variant = variant
+        self.path = path
+        self.top_n = top_n
+        self._top: List[Entry] = []
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Entry]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="leaderboard", daemon=True)
+        self._thread.start()
+
+    @property
+    def top(self) -> List[Entry]:
+        # Cached copy, safe to read every frame
+        with self._lock:
+            return self._top
+
+    @property
+    def high_score(self):
+        top = self.top
+        return top[0].score if top else 0
+
+    def submit(self, score, level, tail_length, duration):
+        # Never blocks: the write is picked up by the background thread
+        self._queue.put(Entry(int(score), int(level), int(tail_length), float(duration), time.time()))
+
+    def close(self, timeout=2.0):
+        # Flush pending writes before the interpreter exits
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Leaderboard disabled: {e}")
+            # Drain submissions so close() still returns promptly
+            while self._queue.get() is not None:
+                pass
+            return
+
+        self._refresh(conn)
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT INTO scores (variant, score, level, tail_length, duration, created_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (self.variant, *entry),
+                    )
+                self._refresh(conn)
+            except sqlite3.Error as e:
+                print(f"Leaderboard write failed: {e}")
+        conn.close()
+
+    def _refresh(self, conn):
+        rows = conn.execute(
+            "SELECT score, level, tail_length, duration, created_at FROM scores"
+            " WHERE variant = ? ORDER BY score DESC, created_at LIMIT ?",
+            (self.variant, self.top_n),
+        ).fetchall()
+        top = [Entry(*row) for row in rows]
+        with self._lock:
+            self._top = top
@@ -0,0 +1,130 @@
+"""Batched steering and aiming for all saucers.
+
+plan() runs once per frame for every saucer together: saucers and asteroids
+go into spatial hashes, then each saucer looks only at its neighbours to
+combine wander, a stand-off orbit around the nearest player, separation from
+other saucers and avoidance of asteroids. Shots are aimed where that player
+will be (lead-target intercept) instead of where it is now.
+"""
+import math
+
+from grid import SpatialHash
+
+
+def wrapped_delta(a, b, size):
+    # Shortest signed distance from a to b on a wrapping axis
+    return (b - a + size / 2) % size - size / 2
+
+
+def intercept_time(dx, dy, vx, vy, speed):
+    # Time for a bullet at `speed` to meet a target at (dx, dy) moving at (vx, vy)
+    a = vx * vx + vy * vy - speed * speed
+    b = 2 * (dx * vx + dy * vy)
+    c = dx * dx + dy * dy
+    if abs(a) < 1e-9:
+        return -c / b if b < 0 else None
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return None
+    root = math.sqrt(disc)
+    times = [t for t in ((-b - root) / (2 * a), (-b + root) / (2 * a)) if t > 0]
+    return min(times) if times else None
+
+
+class SaucerAI:
+    def __init__(self, width, height, bullet_speed, standoff=220, separation=70,
+                 avoid_margin=40, cell_size=80):
+        self.width = width
+        self.height = height
+        self.bullet_speed = bullet_speed
+        self.standoff = standoff
+        self.separation = separation
+        self.avoid_margin = avoid_margin
+        self.neighbours = SpatialHash(width, height, cell_size)
+        self.rocks = SpatialHash(width, height, cell_size)
+
+    def plan(self, saucers, asteroids, targets):
+        # saucers: [(x, y, vx, vy, speed, wander_x, wander_y)], asteroids: [(x, y, radius)]
+        # targets: [(x, y, vx, vy)] players, each saucer goes after the nearest one
+        # Returns [(desired_vx, desired_vy, aim_x, aim_y)] with a unit aim vector
+        width, height = self.width, self.height
+        neighbours, rocks = self.neighbours, self.rocks
+        neighbours.clear()
+        rocks.clear()
+        for i, saucer in enumerate(saucers):
+            neighbours.insert(saucer[0], saucer[1], i)
+        largest = 0
+        for rock in asteroids:
+            rocks.insert(rock[0], rock[1], rock)
+            largest = max(largest, rock[2])
+
+        separation = self.separation
+        avoid_reach = largest + self.avoid_margin
+        results = []
+        for i, (x, y, vx, vy, speed, wander_x, wander_y) in enumerate(saucers):
+            dx = dy = tvx = tvy = 0.0
+            nearest = math.inf
+            for tx, ty, target_vx, target_vy in targets:
+                ox = wrapped_delta(x, tx, width)
+                oy = wrapped_delta(y, ty, height)
+                if ox * ox + oy * oy < nearest:
+                    nearest = ox * ox + oy * oy
+                    dx, dy, tvx, tvy = ox, oy, target_vx, target_vy
+            dist = math.hypot(dx, dy) or 1.0
+
+            # Wander, while drifting toward a ring around the player (if any is left)
+            sx, sy = wander_x, wander_y
+            pull = max(-1.0, min(1.0, (dist - self.standoff) / self.standoff)) if targets else 0.0
+            sx += dx / dist * pull
+            sy += dy / dist * pull
+
+            # Separation from nearby saucers
+            for j in neighbours.query(x, y, separation):
+                if j == i:
+                    continue
+                ox = wrapped_delta(saucers[j][0], x, width)
+                oy = wrapped_delta(saucers[j][1], y, height)
+                d_sq = ox * ox + oy * oy
+                if 0 < d_sq < separation * separation:
+                    d = math.sqrt(d_sq)
+                    push = (separation - d) / separation * 2
+                    sx += ox / d * push
+                    sy += oy / d * push
+
+            # Steer around asteroids in the way
+            for rx, ry, radius in rocks.query(x, y, avoid_reach):
+                ox = wrapped_delta(rx, x, width)
+                oy = wrapped_delta(ry, y, height)
+                d = math.hypot(ox, oy) or 1.0
+                reach = radius + self.avoid_margin
+                if d < reach:
+                    push = (reach - d) / reach * 3
+                    sx += ox / d * push
+                    sy += oy / d * push
+
+            length = math.hypot(sx, sy)
+            if length:
+                desired_vx, desired_vy = sx / length * speed, sy / length * speed
+            else:
+                desired_vx, desired_vy = vx, vy
+
+            # Lead the target
+            t = intercept_time(dx, dy, tvx, tvy, self.bullet_speed)
+            if t is not None:
+                ax, ay = dx + tvx * t, dy + tvy * t
+            else:
+                ax, ay = dx, dy
+            aim = math.hypot(ax, ay) or 1.0
+            results.append((desired_vx, desired_vy, ax / aim, ay / aim))
+        return results
+
+
+def steer(vx, vy, desired_vx, desired_vy, max_force):
+    # Turns the velocity toward the desired one by at most max_force per frame
+    fx = desired_vx - vx
+    fy = desired_vy - vy
+    force = math.hypot(fx, fy)
+    if force > max_force:
+        fx *= max_force / force
+        fy *= max_force / force
+    return vx + fx, vy + fy
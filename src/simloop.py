@@ -0,0 +1,127 @@
+"""Fixed-rate simulation thread that hands state snapshots to the renderer.
+
+The simulation advances at its own tick rate and publishes immutable
+snapshots into a double buffer. The render loop on the main thread draws the
+newest snapshot, so a slow frame no longer delays physics and a slow tick no
+longer delays drawing.
+"""
+import queue
+import threading
+import time
+from collections import deque
+
+
+class DoubleBuffer:
+    def __init__(self):
+        self._slots = [None, None]
+        self._front = 0
+        self._seq = 0
+        self._published_at = 0.0
+        self._cond = threading.Condition()
+
+    def publish(self, snapshot):
+        # Fill the back slot, then swap it to the front
+        back = 1 - self._front
+        self._slots[back] = snapshot
+        with self._cond:
+            self._front = back
+            self._seq += 1
+            self._published_at = time.perf_counter()
+            self._cond.notify_all()
+
+    def latest(self):
+        with self._cond:
+            return self._slots[self._front], self._seq, self._published_at
+
+    def wait_newer(self, seq, timeout):
+        # Blocks until a snapshot newer than `seq` exists or the timeout expires
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != seq, timeout)
+            return self._slots[self._front], self._seq, self._published_at
+
+
+class TimingStats:
+    def __init__(self, name, window=3600):
+        self.name = name
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.worst = max(self.worst, seconds)
+
+    def report(self):
+        if not self.count:
+            return f"{self.name}: no samples"
+        recent = sorted(self.samples)
+        p95 = recent[int(len(recent) * 0.95) - 1] if len(recent) > 1 else recent[0]
+        return (f"{self.name}: {self.count} samples, mean {self.total / self.count * 1000:.2f} ms, "
+                f"p95 {p95 * 1000:.2f} ms, max {self.worst * 1000:.2f} ms")
+
+
+class SimulationThread(threading.Thread):
+    # step(inputs) advances the simulation one tick, snapshot() returns the state to draw.
+    # While idle() is true nothing is stepped and the thread sleeps until a command arrives.
+    def __init__(self, step, snapshot, tick_rate, idle=None):
+        super().__init__(name="simulation", daemon=True)
+        self.step = step
+        self.snapshot = snapshot
+        self.idle = idle
+        self.period = 1.0 / tick_rate
+        self.buffer = DoubleBuffer()
+        self.stats = TimingStats("tick")
+        self.inputs = None
+        self.tick = 0
+        self._commands = queue.SimpleQueue()
+        self._stopping = threading.Event()
+        self.buffer.publish(snapshot())
+
+    def set_inputs(self, inputs):
+        # Replaced atomically, the next tick uses the newest inputs
+        self.inputs = inputs
+
+    def call(self, fn, *args):
+        # Runs fn on the simulation thread before the next tick
+        self._commands.put((fn, args))
+
+    def stop(self):
+        self._stopping.set()
+        self.join()
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while not self._stopping.is_set():
+            if self.idle is not None and self.idle():
+                try:
+                    fn, args = self._commands.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+                else:
+                    fn(*args)
+                    self.buffer.publish(self.snapshot())
+                # Resume from now instead of catching up on the idle stretch
+                next_tick = time.perf_counter()
+                continue
+
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+                continue
+
+            start = time.perf_counter()
+            while not self._commands.empty():
+                fn, args = self._commands.get()
+                fn(*args)
+            self.step(self.inputs)
+            self.tick += 1
+            self.buffer.publish(self.snapshot())
+            self.stats.add(time.perf_counter() - start)
+
+            next_tick += self.period
+            if time.perf_counter() - next_tick > self.period * 5:
+                # Too far behind to catch up, drop the missed ticks instead of spiralling
+                next_tick = time.perf_counter()
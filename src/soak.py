@@ -0,0 +1,173 @@
+"""Long-running soak test support.
+
+Samples tracemalloc, RSS and gc statistics at a fixed interval while the game
+loop runs, reports the allocation sites that grew the most and fails the run
+if memory grows past a threshold once the warm-up period is over.
+AllocationProbe measures how much a single region of the frame allocates.
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+MB = 1024 * 1024
+
+
+def rss_bytes():
+    # Current resident set size, falls back to the peak where /proc is missing
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SoakMonitor:
+    def __init__(self, duration, interval=60.0, max_growth_mb=32.0, top=10, warmup=None):
+        self.duration = duration
+        self.interval = interval
+        self.max_growth = max_growth_mb * MB
+        self.top = top
+        # Caches (fonts, sprites, the leaderboard) fill up early, measure growth after that
+        self.warmup = warmup if warmup is not None else min(interval, duration / 10)
+        self.frames = 0
+        self.samples = []
+        self.baseline = None
+        self.baseline_snapshot = None
+
+    def start(self):
+        tracemalloc.start()
+        self.started = time.perf_counter()
+        self.next_sample = self.started + self.warmup
+        print(f"soak: running for {self.duration:.0f}s, sampling every {self.interval:.0f}s, "
+              f"max growth {self.max_growth / MB:.1f} MB")
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def done(self):
+        return self.elapsed >= self.duration
+
+    def tick(self):
+        # Call once per frame, cheap unless a sample is due
+        self.frames += 1
+        if time.perf_counter() >= self.next_sample:
+            self.sample()
+            self.next_sample += self.interval
+
+    def sample(self):
+        snapshot = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        sample = {
+            "elapsed": self.elapsed,
+            "frames": self.frames,
+            "rss": rss_bytes(),
+            "traced": current,
+            "peak": peak,
+            "gc_counts": gc.get_count(),
+            "gc_collections": [s["collections"] for s in gc.get_stats()],
+            "gc_objects": len(gc.get_objects()),
+        }
+        self.samples.append(sample)
+        if self.baseline is None:
+            self.baseline = sample
+            self.baseline_snapshot = snapshot
+        print(f"soak: {sample['elapsed']:7.0f}s  frames {sample['frames']:9}  "
+              f"rss {sample['rss'] / MB:7.1f} MB ({self._growth(sample, 'rss') / MB:+.1f})  "
+              f"traced {current / MB:6.1f} MB ({self._growth(sample, 'traced') / MB:+.1f})  "
+              f"objects {sample['gc_objects']}  gc {sample['gc_collections']}")
+        self.last_snapshot = snapshot
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def _growth(self, sample, key):
+        return sample[key] - self.baseline[key]
+
+    def finish(self):
+        # Prints the report, returns False if memory grew past the threshold
+        self.sample()
+        last = self.samples[-1]
+        print(f"soak: top {self.top} growing allocation sites since warm-up:")
+        # compare_to sorts by absolute change, shrinking sites would crowd out growth
+        stats = [stat for stat in self.last_snapshot.compare_to(self.baseline_snapshot, "lineno")
+                 if stat.size_diff > 0]
+        stats.sort(key=lambda stat: stat.size_diff, reverse=True)
+        for stat in stats[:self.top]:
+            print(f"  {stat.size_diff / 1024:+9.1f} KiB  {stat.count_diff:+7} blocks  {stat.traceback}")
+        tracemalloc.stop()
+
+        fps = last["frames"] / last["elapsed"] if last["elapsed"] else 0
+        rss_growth = self._growth(last, "rss")
+        traced_growth = self._growth(last, "traced")
+        passed = rss_growth <= self.max_growth and traced_growth <= self.max_growth
+        print(f"soak: {'PASS' if passed else 'FAIL'} after {last['elapsed']:.0f}s and "
+              f"{last['frames']} frames ({fps:.0f} fps): rss {rss_growth / MB:+.1f} MB, "
+              f"traced {traced_growth / MB:+.1f} MB, limit {self.max_growth / MB:.1f} MB")
+        return passed
+
+
+class AllocationProbe:
+    # Allocations made inside one code region per frame, call start()/stop() around it.
+    # Net is what the region kept, transient is the most it had allocated at once.
+    def __init__(self, name, window=3600):
+        self.name = name
+        self.transients = deque(maxlen=window)
+        self.frames = 0
+        self.net_bytes = 0
+        self.net_blocks = 0
+        self.transient_total = 0
+        self.transient_max = 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # The probe's own bookkeeping shows up too, measure an empty region to subtract it
+        self._overhead = (0, 0, 0)
+        samples = [self._measure_empty() for _ in range(5)]
+        self._overhead = tuple(min(values) for values in zip(*samples))
+
+    def _measure_empty(self):
+        self.start()
+        return self._read()
+
+    def start(self):
+        self._current = tracemalloc.get_traced_memory()[0]
+        self._blocks = sys.getallocatedblocks()
+        tracemalloc.reset_peak()
+
+    def _read(self):
+        blocks = sys.getallocatedblocks() - self._blocks
+        current, peak = tracemalloc.get_traced_memory()
+        overhead = self._overhead
+        return (current - self._current - overhead[0], blocks - overhead[1],
+                peak - self._current - overhead[2])
+
+    def stop(self):
+        net, blocks, transient = self._read()
+        self.frames += 1
+        self.net_bytes += net
+        self.net_blocks += blocks
+        self.transient_total += transient
+        self.transients.append(transient)
+        self.transient_max = max(self.transient_max, transient)
+
+    def report(self):
+        if not self.frames:
+            return f"{self.name}: no frames"
+        frames = self.frames
+        median = sorted(self.transients)[len(self.transients) // 2]
+        return (f"{self.name}: {frames} frames, net {self.net_bytes / frames:+.1f} B "
+                f"({self.net_blocks / frames:+.2f} blocks) per frame, transient median "
+                f"{median} B, mean {self.transient_total / frames:.0f} B, max {self.transient_max} B")
@@ -0,0 +1,105 @@
+"""Safe spawn positions from a coarse occupancy grid.
+
+The grid is filled lazily, at most once per frame and only when something
+actually spawns, with the same entities the collision code checks. Free cells
+are kept in a list so a position is found in O(1) expected time; an optional
+minimum spacing against existing objects gives Poisson-disk style spreads.
+Every position handed out is marked at once (blocked by its clearance and
+kept apart from), so several spawns in the same frame avoid each other too.
+"""
+import random
+
+from grid import OccupancyGrid, SpatialHash
+
+EDGES = ("top", "right", "bottom", "left")
+
+
+class SpawnPlanner:
+    # populate(planner) is called to block() everything dangerous before the first query
+    def __init__(self, width, height, populate, cell_size=40, attempts=12):
+        self.width = width
+        self.height = height
+        self.populate = populate
+        self.attempts = attempts
+        self.grid = OccupancyGrid(width, height, cell_size)
+        self.spaced = SpatialHash(width, height, cell_size)
+        self.stale = True
+
+    def invalidate(self):
+        # Call once per frame, after the entities have moved
+        self.stale = True
+
+    def block(self, x, y, radius):
+        self.grid.mark_circle(x, y, radius)
+
+    def keep_apart(self, x, y):
+        # Registers an object new spawns must keep their spacing from
+        self.spaced.insert(x, y, (x, y))
+
+    def _refresh(self):
+        if not self.stale:
+            return
+        self.grid.clear()
+        self.spaced.clear()
+        self.populate(self)
+        self.free = self.grid.free_cells()
+        cols, rows = self.grid.cols, self.grid.rows
+        free = set(self.free)
+        self.free_edges = {
+            "top": [c for c in range(cols) if c in free],
+            "bottom": [(rows - 1) * cols + c for c in range(cols) if (rows - 1) * cols + c in free],
+            "left": [r * cols for r in range(rows) if r * cols in free],
+            "right": [r * cols + cols - 1 for r in range(rows) if r * cols + cols - 1 in free],
+        }
+        self.stale = False
+
+    def _spaced_ok(self, x, y, spacing):
+        if not spacing:
+            return True
+        for sx, sy in self.spaced.query(x, y, spacing):
+            dx = abs(sx - x)
+            dy = abs(sy - y)
+            dx = min(dx, self.width - dx)
+            dy = min(dy, self.height - dy)
+            if dx * dx + dy * dy < spacing * spacing:
+                return False
+        return True
+
+    def _claim(self, x, y, clearance):
+        # Marks a spawn position before the grid is rebuilt next frame
+        if clearance:
+            self.block(x, y, clearance)
+        self.keep_apart(x, y)
+        return [x, y]
+
+    def find_position(self, margin=0, spacing=0, clearance=0):
+        # Random free point at least `margin` from the screen edges, or None if crowded.
+        # `clearance` is blocked around it for later spawns, like block() does for hazards.
+        self._refresh()
+        if not self.free:
+            return None
+        size = self.grid.cell_size
+        for _ in range(self.attempts):
+            x0, y0 = self.grid.cell_origin(random.choice(self.free))
+            x = min(max(x0 + random.uniform(0, size), margin), self.width - margin)
+            y = min(max(y0 + random.uniform(0, size), margin), self.height - margin)
+            if not self.grid.occupied(x, y) and self._spaced_ok(x, y, spacing):
+                return self._claim(x, y, clearance)
+        return None
+
+    def find_edge_position(self, edges=EDGES, clearance=0):
+        # Free point on one of the screen edges, or None if every edge cell is blocked.
+        # Edge cells claimed by earlier spawns this frame are skipped.
+        self._refresh()
+        cells = self.grid.cells
+        choices = [(edge, cell) for edge in edges for cell in self.free_edges[edge] if not cells[cell]]
+        if not choices:
+            return None
+        edge, cell = random.choice(choices)
+        x0, y0 = self.grid.cell_origin(cell)
+        size = self.grid.cell_size
+        if edge in ("top", "bottom"):
+            x = min(x0 + random.uniform(0, size), self.width)
+            return self._claim(x, 0 if edge == "top" else self.height, clearance)
+        y = min(y0 + random.uniform(0, size), self.height)
+        return self._claim(0 if edge == "left" else self.width, y, clearance)
@@ -0,0 +1,70 @@
+"""Split-screen views of one wrapping world.
+
+The world is drawn once per frame onto its own canvas covering the whole
+field at the render scale. Each player then gets a viewport on the screen
+that shows the world centered on their ship: the world is blitted at an
+offset and, because the playfield wraps, repeated once more on each axis
+when the view crosses an edge. With three players the spare quadrant shows
+the whole field scaled down.
+"""
+import pygame
+
+
+def layout(count, width, height):
+    # Viewport rects for `count` players: full screen, side by side, or 2x2 quadrants
+    if count <= 1:
+        return [pygame.Rect(0, 0, width, height)]
+    if count == 2:
+        half = width // 2
+        return [pygame.Rect(0, 0, half, height), pygame.Rect(half, 0, width - half, height)]
+    half_w, half_h = width // 2, height // 2
+    return [pygame.Rect(x, y, half_w, half_h)
+            for y in (0, half_h) for x in (0, half_w)][:count]
+
+
+class SplitScreen:
+    # Rects are in playfield coordinates, blits between the world and the views
+    # in render pixels
+    def __init__(self, count, width, height):
+        self.width = width
+        self.height = height
+        self.rects = layout(count, width, height)
+        self.world = None
+        # Quadrant left over by an odd player count, used for an overview
+        self.overview = pygame.Rect(width // 2, height // 2, width - width // 2,
+                                    height - height // 2) if count == 3 else None
+
+    def world_canvas(self, canvas):
+        # Canvas to draw the world on, remade when the render scale of `canvas` changes
+        if self.world is None or self.world.scale != canvas.scale:
+            self.world = canvas.layer((self.width, self.height), colorkey=False)
+        return self.world
+
+    def views(self, canvas):
+        # (viewport canvas, rect) for each player, in player order
+        return [(canvas.subsurface(rect), rect) for rect in self.rects]
+
+    def show(self, view, center):
+        # Blits the world into `view` so that `center` lands in its middle
+        world = self.world.surface
+        target = view.surface
+        view_w, view_h = target.get_size()
+        width, height = world.get_size()
+        left = int(center[0] * view.scale - view_w / 2) % width
+        top = int(center[1] * view.scale - view_h / 2) % height
+        target.blit(world, (-left, -top))
+        if left + view_w > width:
+            target.blit(world, (width - left, -top))
+        if top + view_h > height:
+            target.blit(world, (-left, height - top))
+            if left + view_w > width:
+                target.blit(world, (width - left, height - top))
+
+    def draw_overview(self, canvas):
+        if self.overview:
+            rect = canvas.pixel_rect(self.overview)
+            pygame.transform.scale(self.world.surface, rect.size, canvas.surface.subsurface(rect))
+
+    def draw_borders(self, canvas, color):
+        for rect in self.rects:
+            canvas.rect(color, rect, 1)
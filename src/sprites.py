@@ -0,0 +1,182 @@
+"""Precomputed rotation tables and pre-rendered rotated sprites.
+
+Ship angles are whole degrees that only change in fixed steps, so their
+sines and cosines come from tables instead of math.radians/cos/sin, and the
+ship is drawn from a sheet that already holds it at every reachable angle:
+one table lookup and one blit instead of building and filling polygons.
+Long snake tails are cached the same way: their simplified chunks never
+change, so they are drawn once onto a layer that is blitted every frame.
+Sheets can be passed in ready-made, so they can come from the on-disk
+cache (assetcache) instead of being drawn at every start.
+"""
+import math
+
+import pygame
+
+# Indexed by whole degrees 0-359, the ship's angle convention is counter-clockwise
+COS = [math.cos(math.radians(degrees)) for degrees in range(360)]
+SIN = [math.sin(math.radians(degrees)) for degrees in range(360)]
+
+COLORKEY = (255, 0, 255)
+# Characters pre-rendered for HUD text
+GLYPHS = "".join(chr(code) for code in range(32, 127))
+
+
+def rotated(points, angle):
+    # Polar (angle offset in radians, distance) points turned by `angle` degrees,
+    # relative to the center with y pointing down
+    rad = math.radians(angle)
+    return [(math.cos(rad + offset) * distance, -math.sin(rad + offset) * distance)
+            for offset, distance in points]
+
+
+def sprite(sheet, rect=None, colorkey=True):
+    # Display format copy of (part of) a sheet: run-length encoded colorkey for
+    # solid sprites, per-pixel alpha otherwise
+    cell = sheet.subsurface(rect) if rect else sheet
+    if pygame.display.get_surface() is None:
+        cell = cell.copy()
+    elif colorkey:
+        cell = cell.convert()
+    else:
+        return cell.convert_alpha()
+    if colorkey:
+        cell.set_colorkey(COLORKEY, pygame.RLEACCEL)
+    return cell
+
+
+def strip(sheet, count, colorkey=True):
+    # Sprites from a sheet of `count` equally wide cells side by side
+    width = sheet.get_width() // count
+    return [sprite(sheet, (i * width, 0, width, sheet.get_height()), colorkey) for i in range(count)]
+
+
+class RotationAtlas:
+    # One sheet with a cell per reachable angle (multiples of `step` degrees) and a
+    # row per variant. Each variant is draw(surface, center, angle) for one sprite.
+    # Cells are blitted from their own run-length encoded copies: blitting an area
+    # of one big RLE sheet has to skip through the encoded rows and is much slower.
+    def __init__(self, variants, radius, step, sheet=None):
+        self.step = step
+        self.cell = cell_size(radius)
+        self.half = self.cell // 2
+        count = 360 // step
+        self.sheet = sheet if sheet is not None else self.render(variants, radius, step)
+        self.rects = [[pygame.Rect(i * self.cell, row * self.cell, self.cell, self.cell)
+                       for i in range(count)] for row in range(len(variants))]
+        self.cells = [[sprite(self.sheet, rect) for rect in rects] for rects in self.rects]
+
+    @staticmethod
+    def render(variants, radius, step):
+        cell = cell_size(radius)
+        count = 360 // step
+        sheet = pygame.Surface((cell * count, cell * len(variants)))
+        sheet.fill(COLORKEY)
+        for row, draw in enumerate(variants):
+            for i in range(count):
+                draw(sheet, (i * cell + cell // 2, row * cell + cell // 2), i * step)
+        return sheet
+
+    def blit(self, surface, pos, angle, variant=0):
+        cell = self.cells[variant][int(angle) % 360 // self.step]
+        surface.blit(cell, (int(pos[0]) - self.half, int(pos[1]) - self.half))
+
+
+def cell_size(radius):
+    return 2 * math.ceil(radius) + 4
+
+
+class GlyphAtlas:
+    # Pre-rendered characters of one font and color for HUD text. Lines are put
+    # together from the glyphs (by advance, without kerning) when their text
+    # changes, so a HUD line that stays the same is a single blit.
+    def __init__(self, font, color, sheet=None, max_lines=64):
+        self.widths = {char: font.size(char)[0] for char in GLYPHS}
+        self.height = font.get_height()
+        self.sheet = sheet if sheet is not None else self.render(font, color)
+        self.glyphs = {}
+        x = 0
+        for char in GLYPHS:
+            self.glyphs[char] = self.sheet.subsurface((x, 0, self.widths[char], self.height))
+            x += self.widths[char]
+        self.max_lines = max_lines
+        self._lines = {}
+
+    @staticmethod
+    def render(font, color):
+        sheet = pygame.Surface((sum(font.size(char)[0] for char in GLYPHS), font.get_height()),
+                               pygame.SRCALPHA)
+        x = 0
+        for char in GLYPHS:
+            # MAX copies the glyph's pixels onto the transparent sheet without blending
+            sheet.blit(font.render(char, True, color), (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += font.size(char)[0]
+        return sheet
+
+    def line(self, text):
+        surface = self._lines.get(text)
+        if surface is None:
+            surface = pygame.Surface((max(1, self.width(text)), self.height), pygame.SRCALPHA)
+            x = 0
+            for char in text:
+                if char not in self.glyphs:
+                    char = "?"
+                surface.blit(self.glyphs[char], (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+                x += self.widths[char]
+            surface = sprite(surface, colorkey=False)
+            if len(self._lines) >= self.max_lines:
+                self._lines.clear()
+            self._lines[text] = surface
+        return surface
+
+    def width(self, text):
+        widths = self.widths
+        return sum(widths.get(char, widths["?"]) for char in text)
+
+    def blit(self, surface, text, pos):
+        surface.blit(self.line(text), pos)
+
+
+class TailLayer:
+    # Colorkeyed layer holding the simplified chunks of one TailLOD, except the
+    # oldest one which trim() keeps cutting shorter. New chunks are drawn onto it
+    # as they appear; it is redrawn when old chunks drop off, the tail's length
+    # changed enough to shift the color gradient or the render scale changed.
+    # Tails with fewer than `min_chunks` chunks are cheaper to draw directly than
+    # to blit a full layer.
+    def __init__(self, size, line_width=6, min_chunks=32):
+        self.size = size
+        self.line_width = line_width
+        self.min_chunks = min_chunks
+        self.layer = None
+        self._first = None
+        self._count = 0
+        self._length = 0
+
+    def _draw_chunks(self, canvas, tail, color, first, stop=None):
+        length = len(tail)
+        for i, run in tail.chunk_runs(first, stop):
+            canvas.lines(color(i, length), False, run, self.line_width)
+
+    def draw(self, canvas, tail, color):
+        # color(i, length) is the color of the chunk starting at raw point i
+        cold = tail.cold
+        if len(cold) < self.min_chunks:
+            self._first = None
+            self._draw_chunks(canvas, tail, color, 0)
+            return
+        if self.layer is None or self.layer.scale != canvas.scale:
+            self.layer = canvas.layer(self.size)
+            self._first = None
+        length = len(tail)
+        if self._first is not cold[1] or abs(length - self._length) * 16 > length:
+            self.layer.fill(COLORKEY)
+            self._draw_chunks(self.layer, tail, color, 1)
+            self._first = cold[1]
+            self._length = length
+        elif len(cold) > self._count:
+            self._draw_chunks(self.layer, tail, color, self._count)
+        self._count = len(cold)
+        self._draw_chunks(canvas, tail, color, 0, 1)
+        # Already at the render scale, blitted as it is
+        canvas.surface.blit(self.layer.surface, (0, 0))
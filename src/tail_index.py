@@ -0,0 +1,132 @@
+"""Spatial index over the tail segments of every player.
+
+With several snakes each head has to avoid every tail, so checking all
+segments of all tails costs players * total tail length per frame. The index
+buckets segments by grid cell and a head only looks at the cells around it.
+Simplified chunks of a TailLOD never change once created, so they are
+indexed once and only added or dropped as chunks come and go. The hot
+points near each head are re-indexed whenever their tail grew, together
+with how recent they are so a head can ignore its own neck. Tails that did
+not change since the last update are skipped entirely.
+"""
+import math
+
+from tail_lod import segment_distance_sq
+
+# Chunk segments are always older than any skip_recent a head uses
+OLD = 1 << 30
+EMPTY = {}
+
+
+class TailIndex:
+    def __init__(self, width, height, cell_size=32):
+        self.cell_size = cell_size
+        self.cols = math.ceil(width / cell_size)
+        self.rows = math.ceil(height / cell_size)
+        # cell -> {key: [segments]}, keyed by chunk id for chunks and by owner for hot points
+        self.cold = {}
+        self.hot = {}
+        # owner -> {chunk id: (chunk, cells)}, holding the chunk keeps its id unique
+        self._chunks = {}
+        # owner -> cells holding its hot segments
+        self._hot_cells = {}
+        # owner -> what its tail looked like when last indexed
+        self._seen = {}
+
+    def __len__(self):
+        return sum(len(chunks) for chunks in self._chunks.values())
+
+    def clear(self):
+        self.cold.clear()
+        self.hot.clear()
+        self._chunks.clear()
+        self._hot_cells.clear()
+        self._seen.clear()
+
+    def _cells(self, min_x, min_y, max_x, max_y):
+        size, cols, rows = self.cell_size, self.cols, self.rows
+        col0 = int(min_x // size)
+        col1 = min(int(max_x // size), col0 + cols - 1)
+        row0 = int(min_y // size)
+        row1 = min(int(max_y // size), row0 + rows - 1)
+        for row in range(row0, row1 + 1):
+            base = (row % rows) * cols
+            for col in range(col0, col1 + 1):
+                yield base + col % cols
+
+    def _insert(self, layer, key, owner, tail, points, newest):
+        # Adds (owner, newness, ax, ay, bx, by) for every segment that does not wrap,
+        # newness counts the points newer than the segment's newer end. Returns the cells.
+        cells = set()
+        for i in range(1, len(points)):
+            a, b = points[i - 1], points[i]
+            if tail.is_wrap(a, b):
+                continue
+            ax, ay = a
+            bx, by = b
+            segment = (owner, newest - i, ax, ay, bx, by)
+            for cell in self._cells(min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)):
+                layer.setdefault(cell, {}).setdefault(key, []).append(segment)
+                cells.add(cell)
+        return cells
+
+    def _remove(self, layer, key, cells):
+        for cell in cells:
+            bucket = layer[cell]
+            del bucket[key]
+            if not bucket:
+                del layer[cell]
+
+    def update(self, tails):
+        # tails: {owner: TailLOD}, call once per frame after every tail moved.
+        # Only tails that changed since the last update are re-indexed.
+        for owner in list(self._seen):
+            if owner not in tails:
+                self._drop(owner)
+        for owner, tail in tails.items():
+            cold, hot = tail.cold, tail.hot
+            seen = (len(cold), id(cold[0]) if cold else 0, id(cold[-1]) if cold else 0,
+                    len(hot), id(hot[-1]) if hot else 0)
+            if self._seen.get(owner) == seen:
+                continue
+            self._seen[owner] = seen
+
+            chunks = self._chunks.get(owner, {})
+            live = {}
+            for chunk in cold:
+                key = id(chunk)
+                entry = chunks.pop(key, None)
+                if entry is None:
+                    entry = chunk, self._insert(self.cold, key, owner, tail, chunk.points, OLD)
+                live[key] = entry
+            for key, (_, cells) in chunks.items():
+                self._remove(self.cold, key, cells)
+            self._chunks[owner] = live
+
+            self._remove(self.hot, owner, self._hot_cells.get(owner, ()))
+            self._hot_cells[owner] = self._insert(self.hot, owner, owner, tail, hot, len(hot) - 1)
+
+    def _drop(self, owner):
+        for key, (_, cells) in self._chunks.pop(owner, {}).items():
+            self._remove(self.cold, key, cells)
+        self._remove(self.hot, owner, self._hot_cells.pop(owner, ()))
+        del self._seen[owner]
+
+    def hit(self, x, y, radius, owner=None, skip_recent=0):
+        # Owner of a tail passing within `radius` of (x, y), or None. The newest
+        # `skip_recent` points of `owner`'s own tail are ignored.
+        radius_sq = radius * radius
+        for cell in self._cells(x - radius, y - radius, x + radius, y + radius):
+            for segments in self.cold.get(cell, EMPTY).values():
+                for segment in segments:
+                    _, _, ax, ay, bx, by = segment
+                    if segment_distance_sq(x, y, ax, ay, bx, by) < radius_sq:
+                        return segment[0]
+            for segments in self.hot.get(cell, EMPTY).values():
+                for segment in segments:
+                    who, newness, ax, ay, bx, by = segment
+                    if who == owner and newness < skip_recent:
+                        continue
+                    if segment_distance_sq(x, y, ax, ay, bx, by) < radius_sq:
+                        return who
+        return None
@@ -0,0 +1,246 @@
+"""Level-of-detail storage for the snake tail.
+
+The newest points near the head are kept at full resolution. Older points
+are compacted in fixed size chunks into simplified polylines
+(Douglas-Peucker within a pixel tolerance), so a long and mostly straight
+tail needs a fraction of the points for memory, drawing and collision.
+Points are stored oldest first.
+"""
+import math
+from collections import deque
+
+
+def simplify(points, tolerance):
+    # Douglas-Peucker, returns the indices of the points to keep
+    last = len(points) - 1
+    if last < 2:
+        return list(range(last + 1))
+    keep = [False] * (last + 1)
+    keep[0] = keep[last] = True
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, last)]
+    while stack:
+        first, end = stack.pop()
+        ax, ay = points[first]
+        bx, by = points[end]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        worst, worst_sq = 0, tolerance_sq
+        for i in range(first + 1, end):
+            px, py = points[i]
+            if length_sq:
+                cross = (px - ax) * dy - (py - ay) * dx
+                dist_sq = cross * cross / length_sq
+            else:
+                dist_sq = (px - ax) ** 2 + (py - ay) ** 2
+            if dist_sq > worst_sq:
+                worst, worst_sq = i, dist_sq
+        if worst:
+            keep[worst] = True
+            stack.append((first, worst))
+            stack.append((worst, end))
+    return [i for i in range(last + 1) if keep[i]]
+
+
+def segment_distance_sq(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq:
+        t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+        ax += t * dx
+        ay += t * dy
+    return (px - ax) ** 2 + (py - ay) ** 2
+
+
+class Chunk:
+    # A simplified run of `count` raw points. `offsets` holds the raw index of
+    # every kept point; the last point is shared with the following section.
+    # `runs` caches the points split at wraps once the chunk is first drawn.
+    __slots__ = ("points", "offsets", "count", "bounds", "runs")
+
+    def __init__(self, points, offsets, count):
+        self.points = points
+        self.offsets = offsets
+        self.count = count
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+        self.runs = None
+
+
+class TailLOD:
+    def __init__(self, width, height, tolerance=1.0, hot_points=32, chunk_size=16):
+        self.width = width
+        self.height = height
+        self.tolerance = tolerance
+        self.hot_points = hot_points
+        self.chunk_size = chunk_size
+        self.hot = deque()
+        self.cold = deque()
+        self.cold_count = 0
+
+    def __len__(self):
+        return self.cold_count + len(self.hot)
+
+    def clear(self):
+        self.hot.clear()
+        self.cold.clear()
+        self.cold_count = 0
+
+    def copy(self):
+        # Chunks are never modified in place once trimmed, so sharing them is safe
+        tail = TailLOD(self.width, self.height, self.tolerance, self.hot_points, self.chunk_size)
+        tail.hot = deque(self.hot)
+        tail.cold = deque(self.cold)
+        tail.cold_count = self.cold_count
+        return tail
+
+    def is_wrap(self, a, b):
+        # Consecutive points this far apart mean the ship wrapped around the screen
+        return abs(a[0] - b[0]) > self.width / 2 or abs(a[1] - b[1]) > self.height / 2
+
+    def append(self, point):
+        hot = self.hot
+        hot.append(point)
+        if len(hot) < self.hot_points + self.chunk_size:
+            return
+        # Move the oldest raw points into a simplified chunk
+        raw = [hot.popleft() for _ in range(self.chunk_size)]
+        raw.append(hot[0])
+        # Simplify each piece between wraps on its own, keeping both ends of a jump
+        pieces = []
+        start = 0
+        for i in range(len(raw) - 1):
+            if self.is_wrap(raw[i], raw[i + 1]):
+                pieces.append((start, i))
+                start = i + 1
+        pieces.append((start, len(raw) - 1))
+        offsets = []
+        for start, end in pieces:
+            offsets.extend(start + k for k in simplify(raw[start:end + 1], self.tolerance))
+        points = [raw[i] for i in offsets]
+        self.cold.append(Chunk(points, offsets, self.chunk_size))
+        self.cold_count += self.chunk_size
+
+    def trim(self, max_points):
+        # Drop the oldest points until at most `max_points` raw points remain
+        excess = len(self) - max_points
+        while excess > 0 and self.cold:
+            chunk = self.cold[0]
+            if chunk.count <= excess:
+                self.cold.popleft()
+                self.cold_count -= chunk.count
+                excess -= chunk.count
+                continue
+            self.cold[0] = self._cut(chunk, chunk.count - excess)
+            self.cold_count -= excess
+            excess = 0
+        while excess > 0 and self.hot:
+            self.hot.popleft()
+            excess -= 1
+
+    def _cut(self, chunk, remaining):
+        # Shorten a chunk to its newest `remaining` raw points, interpolating the new end
+        cut = chunk.offsets[-1] - remaining
+        offsets = chunk.offsets
+        i = 0
+        while offsets[i] < cut:
+            i += 1
+        points = chunk.points[i:]
+        new_offsets = [o - cut for o in offsets[i:]]
+        if offsets[i] > cut and i > 0 and not self.is_wrap(chunk.points[i - 1], chunk.points[i]):
+            (ax, ay), (bx, by) = chunk.points[i - 1], chunk.points[i]
+            t = (cut - offsets[i - 1]) / (offsets[i] - offsets[i - 1])
+            points.insert(0, (ax + (bx - ax) * t, ay + (by - ay) * t))
+            new_offsets.insert(0, 0)
+        return Chunk(points, new_offsets, remaining)
+
+    def polylines(self, include_hot=True):
+        # Runs of connected points (oldest first), split where the tail wraps
+        sections = [chunk.points for chunk in self.cold]
+        if include_hot:
+            sections.append(self.hot)
+        runs = []
+        run = []
+        last = None
+        for section in sections:
+            for point in section:
+                if point is last:
+                    continue  # Shared by a chunk and whatever follows it
+                if last is not None and self.is_wrap(last, point):
+                    if len(run) > 1:
+                        runs.append(run)
+                    run = []
+                run.append(point)
+                last = point
+        if len(run) > 1:
+            runs.append(run)
+        return runs
+
+    def chunk_runs(self, first=0, stop=None):
+        # (raw index of the first point, points) for the simplified chunks first..stop,
+        # split at wraps
+        offset = 0
+        for n, chunk in enumerate(self.cold):
+            if stop is not None and n >= stop:
+                break
+            if n >= first:
+                if chunk.runs is None:
+                    chunk.runs = self._split(chunk.points)
+                for run in chunk.runs:
+                    yield offset, run
+            offset += chunk.count
+
+    def _split(self, points):
+        runs = []
+        run = [points[0]]
+        for point in points[1:]:
+            if self.is_wrap(run[-1], point):
+                if len(run) > 1:
+                    runs.append(run)
+                run = []
+            run.append(point)
+        if len(run) > 1:
+            runs.append(run)
+        return runs
+
+    def lethal_points(self, skip_recent=0, spacing=None):
+        # All points except the newest `skip_recent`; with `spacing` the simplified
+        # segments are resampled so that long straight runs are not left empty
+        points = []
+        for chunk in self.cold:
+            previous = None
+            for point in chunk.points:
+                if spacing and previous is not None and not self.is_wrap(previous, point):
+                    (ax, ay), (bx, by) = previous, point
+                    steps = int(math.hypot(bx - ax, by - ay) // spacing)
+                    for s in range(1, steps + 1):
+                        t = s / (steps + 1)
+                        points.append((ax + (bx - ax) * t, ay + (by - ay) * t))
+                points.append(point)
+                previous = point
+        hot = self.hot
+        for i in range(len(hot) - skip_recent):
+            points.append(hot[i])
+        return points
+
+    def hits(self, x, y, radius, skip_recent=0):
+        # True if (x, y) is within `radius` of the tail, ignoring the newest points
+        radius_sq = radius * radius
+        for chunk in self.cold:
+            min_x, min_y, max_x, max_y = chunk.bounds
+            if x < min_x - radius or x > max_x + radius or y < min_y - radius or y > max_y + radius:
+                continue
+            points = chunk.points
+            for i in range(1, len(points)):
+                a, b = points[i - 1], points[i]
+                if self.is_wrap(a, b):
+                    continue
+                if segment_distance_sq(x, y, a[0], a[1], b[0], b[1]) < radius_sq:
+                    return True
+        hot = self.hot
+        for i in range(len(hot) - skip_recent):
+            px, py = hot[i]
+            if (px - x) ** 2 + (py - y) ** 2 < radius_sq:
+                return True
+        return False
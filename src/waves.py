@@ -0,0 +1,99 @@
+"""Data-driven spawn scheduling.
+
+Waves are loaded from waves.json, one list per game variant. Each wave names
+an entity type and how often it spawns, all in simulation ticks so runs are
+deterministic in headless and replay modes:
+
+    first     ticks until the first spawn
+    interval  ticks between spawns
+    count     entities per spawn (default 1)
+    cap       no spawn while this many are alive, retried after `retry` ticks
+    refill    instead of `count`, top the type up to this many alive
+    retry     ticks to wait when capped or no safe position exists (default 30)
+    once      spawn a single time, e.g. the asteroids a run starts with
+
+Other keys (like asteroid "sizes") are passed through to the spawner.
+
+Any number may be a per-level formula instead:
+{"base": 300, "per_level": -10, "every": 1, "min": 30, "max": ...}, giving
+base + per_level * (level // every), clamped to min/max.
+
+Pending spawns live in a heap keyed by due tick, so a frame where nothing is
+due costs one comparison. When a `count` wave runs out of safe spots partway,
+its heap entry carries how many are still missing and the retry only spawns
+those.
+"""
+import heapq
+import json
+import os
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "waves.json")
+
+
+def scaled(value, level):
+    if not isinstance(value, dict):
+        return value
+    result = value.get("base", 0) + value.get("per_level", 0) * (level // value.get("every", 1))
+    if "min" in value:
+        result = max(value["min"], result)
+    if "max" in value:
+        result = min(value["max"], result)
+    return result
+
+
+def load_waves(variant, path=DEFAULT_PATH):
+    with open(path) as f:
+        return json.load(f)[variant]
+
+
+class WaveScheduler:
+    # spawners: {type: fn(wave) -> bool}, False when there was no safe spot
+    # counters: {type: fn() -> int}, how many of that type are alive
+    def __init__(self, waves, spawners, counters):
+        for wave in waves:
+            if wave["type"] not in spawners:
+                raise ValueError(f"no spawner for wave type {wave['type']!r}")
+        self.waves = waves
+        self.spawners = spawners
+        self.counters = counters
+        self.reset()
+
+    def reset(self, tick=0):
+        self.heap = []
+        for seq, wave in enumerate(self.waves):
+            heapq.heappush(self.heap, (tick + wave.get("first", 0), seq, wave, None))
+
+    def next_due(self):
+        return self.heap[0][0] if self.heap else None
+
+    def advance(self, tick, level=1):
+        heap = self.heap
+        while heap and heap[0][0] <= tick:
+            _, seq, wave, missing = heapq.heappop(heap)
+            delay, missing = self._fire(wave, level, missing)
+            if delay is not None:
+                heapq.heappush(heap, (tick + max(1, delay), seq, wave, missing))
+
+    def _fire(self, wave, level, missing=None):
+        # Spawns what the wave asks for, or the `missing` rest of a count wave that
+        # was cut short. Returns (ticks until it is due again, None once a one-shot
+        # wave is done; how many the retry still has to spawn, None for a full wave).
+        kind = wave["type"]
+        retry = scaled(wave.get("retry", 30), level)
+        alive = self.counters[kind]() if kind in self.counters else 0
+        if "refill" in wave:
+            # Counts what is alive, so spawns before a failed one are not repeated
+            wanted = scaled(wave["refill"], level) - alive
+        else:
+            wanted = scaled(wave.get("count", 1), level) if missing is None else missing
+            if "cap" in wave:
+                wanted = min(wanted, scaled(wave["cap"], level) - alive)
+                if wanted <= 0:
+                    return retry, None
+        spawn = self.spawners[kind]
+        for placed in range(wanted):
+            if not spawn(wave):
+                return retry, (None if "refill" in wave else wanted - placed)
+        if wave.get("once"):
+            return None, None
+        return scaled(wave["interval"], level), None